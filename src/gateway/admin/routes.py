@@ -28,6 +28,7 @@ from .schemas import (
     ApiKeyResponse,
     ApiKeyUpdateRequest,
     BulkApiKeyCreateRequest,
+    BulkModelCostCreateRequest,
     ModelCostCreateRequest,
     ModelCostResponse,
     UsageSummaryResponse,
@@ -387,6 +388,50 @@ async def create_or_update_model_cost(
         )
 
 
+@admin_router.post("/costs/bulk", response_model=List[ModelCostResponse])
+async def create_or_update_bulk_model_costs(
+    request: BulkModelCostCreateRequest, _: bool = Depends(get_admin_auth)
+):
+    """Create or update multiple model cost configurations"""
+    try:
+        model_costs = [
+            ModelCost(
+                model_name=cost.model_name,
+                provider=cost.provider,
+                input_cost_per_million_tokens_usd=cost.input_cost_per_million_tokens_usd,
+                output_cost_per_million_tokens_usd=cost.output_cost_per_million_tokens_usd,
+                cache_hit_cost_per_million_tokens_usd=cost.cache_hit_cost_per_million_tokens_usd,
+                cache_write_cost_per_million_tokens_usd=cost.cache_write_cost_per_million_tokens_usd,
+            )
+            for cost in request.costs
+        ]
+
+        await modelcost_repo.bulk_upsert_costs(model_costs)
+
+        # Invalidate cache
+        cache_manager = get_cache_manager()
+        for model_cost in model_costs:
+            await cache_manager.invalidate_model_cost(model_cost.model_name)
+
+        return [
+            ModelCostResponse(
+                model_name=cost.model_name,
+                provider=cost.provider,
+                input_cost_per_million_tokens_usd=cost.input_cost_per_million_tokens_usd,
+                output_cost_per_million_tokens_usd=cost.output_cost_per_million_tokens_usd,
+                cache_hit_cost_per_million_tokens_usd=cost.cache_hit_cost_per_million_tokens_usd,
+                cache_write_cost_per_million_tokens_usd=cost.cache_write_cost_per_million_tokens_usd,
+                updated_at=cost.updated_at,
+            )
+            for cost in model_costs
+        ]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create/update model costs: {str(e)}"
+        )
+
+
 @admin_router.get("/costs", response_model=List[ModelCostResponse])
 async def list_model_costs(_: bool = Depends(get_admin_auth)):
     """List all model cost configurations"""
@@ -137,3 +137,11 @@ class BulkApiKeyCreateRequest(BaseModel):
         None, description="List of allowed models"
     )
     is_active: bool = Field(True, description="Whether keys are active")
+
+
+class BulkModelCostCreateRequest(BaseModel):
+    """Schema for creating or updating multiple model costs"""
+
+    costs: List[ModelCostCreateRequest] = Field(
+        ..., min_length=1, description="Model cost configurations"
+    )
@@ -6,10 +6,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from gateway.utils.config import settings
+from gateway.utils.responses import ORJSONResponse
 from gateway.database import connect_to_mongo, close_mongo_connection
 from gateway.cache import connect_to_redis, close_redis_connection, get_cache_manager
 from gateway.middleware import add_exception_handlers, add_cors_middleware, add_logging_middleware
 from gateway.api import api_router
+from gateway.api.routes import proxy_router
 from gateway.admin import admin_router
 
 # Configure logging
@@ -17,6 +19,11 @@ logging.basicConfig(
     level=getattr(logging, settings.log_level.upper()),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
+# The format uses no thread or process fields, so skip collecting them for
+# every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
 
@@ -73,6 +80,14 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to start cache manager: {e}")
         raise
 
+    # Start background billing
+    try:
+        await proxy_router.billing_manager.start()
+        logger.info("Billing flusher started")
+    except Exception as e:
+        logger.error(f"Failed to start billing flusher: {e}")
+        raise
+
     logger.info("LLM Gateway application startup completed")
 
     yield
@@ -80,6 +95,13 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down LLM Gateway application")
 
+    # Bill queued usage before connections close
+    try:
+        await proxy_router.billing_manager.stop()
+        logger.info("Billing flusher stopped")
+    except Exception as e:
+        logger.error(f"Error stopping billing flusher: {e}")
+
     # Stop cache manager
     try:
         cache_manager = get_cache_manager()
@@ -88,6 +110,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping cache manager: {e}")
 
+    # Close upstream HTTP sessions
+    try:
+        await proxy_router.aclose()
+        logger.info("Upstream HTTP sessions closed")
+    except Exception as e:
+        logger.error(f"Error closing upstream HTTP sessions: {e}")
+
     # Close connections
     try:
         await close_redis_connection()
@@ -109,7 +138,8 @@ app = FastAPI(
     title="LLM API Gateway",
     description="High-performance LLM API Gateway with cost tracking and budget management",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add middleware
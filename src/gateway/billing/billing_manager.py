@@ -2,18 +2,29 @@
 Billing management with atomic operations
 """
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from gateway.cache import get_cache_manager
 from gateway.database.repositories import AccountRepository, UsageLogRepository
 from gateway.models import Account, ApiKey, UsageLog
+from gateway.utils.config import settings
 
 from .cost_calculator import CostCalculator
 
 logger = logging.getLogger(__name__)
 
+# Queued usage is billed in batches of up to _BILLING_BATCH_SIZE records, and
+# no record waits longer than _BILLING_FLUSH_SECONDS
+_BILLING_QUEUE_SIZE = 10_000
+_BILLING_BATCH_SIZE = 500
+_BILLING_FLUSH_SECONDS = 5.0
+# Records arriving while the queue is full wait for space in at most this many
+# tasks; beyond that they are dropped and counted
+_BILLING_OVERFLOW_TASKS = 64
+
 
 class BillingManager:
     """Manage billing operations with atomic account updates"""
@@ -23,6 +34,224 @@ class BillingManager:
         self.usage_repo = UsageLogRepository()
         self.cost_calculator = CostCalculator()
         self.cache_manager = get_cache_manager()
+        self.enabled = settings.billing_enabled
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._overflow_tasks: Set[asyncio.Task] = set()
+        self.dropped_records = 0
+
+    async def start(self):
+        """Start the background billing flusher"""
+        self._queue = asyncio.Queue(maxsize=_BILLING_QUEUE_SIZE)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info("Billing flusher started")
+
+    async def stop(self):
+        """Bill everything still queued and stop the flusher"""
+        # Overflow records are queued first so the sentinel lands behind them
+        await self._wait_overflow()
+
+        if self._flush_task is not None:
+            # The sentinel is queued behind all pending records
+            await self._queue.put(None)
+            await self._flush_task
+            self._flush_task = None
+            self._queue = None
+
+        await self._wait_overflow()
+
+    async def _wait_overflow(self):
+        """Wait for overflow tasks, including any started while waiting"""
+        while self._overflow_tasks:
+            await asyncio.gather(*self._overflow_tasks, return_exceptions=True)
+
+    def enqueue_usage(
+        self,
+        api_key: ApiKey,
+        account: Account,
+        model_name: str,
+        usage_data: Dict[str, Any],
+        request_endpoint: str,
+        request_payload: Dict[str, Any],
+        response_payload: Dict[str, Any],
+        client_ip: Optional[str] = None,
+        processing_time_ms: Optional[float] = None,
+    ) -> None:
+        """
+        Queue usage for background billing without waiting on the database
+
+        When the queue is full the record waits for space in an overflow task,
+        and when the flusher is not running it is billed in one. Overflow tasks
+        are bounded; records beyond the bound are dropped and counted in
+        dropped_records
+        """
+        record = {
+            "api_key": api_key,
+            "account": account,
+            "model_name": model_name,
+            "usage_data": usage_data,
+            "request_endpoint": request_endpoint,
+            "request_payload": request_payload,
+            "response_payload": response_payload,
+            "client_ip": client_ip,
+            "processing_time_ms": processing_time_ms,
+            "timestamp": datetime.utcnow(),
+        }
+
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait(record)
+                return
+            except asyncio.QueueFull:
+                pass
+
+        if len(self._overflow_tasks) >= _BILLING_OVERFLOW_TASKS:
+            self.dropped_records += 1
+            logger.error(
+                "Billing backlog full, dropped usage for user %s model %s "
+                "(%d dropped so far)",
+                account.user_id, model_name, self.dropped_records,
+            )
+            return
+
+        if self._queue is not None:
+            # Waiting for queue space keeps overflow on the batched path
+            logger.warning("Billing queue full, waiting for space")
+            overflow = self._queue.put(record)
+        else:
+            overflow = self._bill_batch([record])
+        task = asyncio.create_task(overflow)
+        self._overflow_tasks.add(task)
+        task.add_done_callback(self._overflow_tasks.discard)
+
+    async def _flush_loop(self):
+        """Collect queued usage into batches and bill each batch"""
+        loop = asyncio.get_running_loop()
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+
+        while True:
+            timeout = max(deadline - loop.time(), 0) if batch else None
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await self._bill_batch(batch)
+                batch = []
+                continue
+
+            if record is None:
+                await self._bill_batch(batch)
+                return
+
+            if not batch:
+                deadline = loop.time() + _BILLING_FLUSH_SECONDS
+            batch.append(record)
+            if len(batch) >= _BILLING_BATCH_SIZE:
+                await self._bill_batch(batch)
+                batch = []
+
+    async def _bill_batch(self, records: List[Dict[str, Any]]):
+        """Bill queued usage with one spend update per user and one log insert"""
+        if not records:
+            return
+
+        spend_by_user: Dict[str, float] = {}
+        usage_logs: List[UsageLog] = []
+
+        for record in records:
+            try:
+                usage_data = record["usage_data"]
+                error_message = None
+                try:
+                    cost_breakdown = await self.cost_calculator.calculate_cost(
+                        model_name=record["model_name"], usage_data=usage_data
+                    )
+                    total_cost = cost_breakdown["total_cost_usd"]
+                except Exception as e:
+                    logger.error(f"Error in billing process: {e}")
+                    total_cost = 0.0
+                    error_message = f"Billing error: {str(e)}"
+
+                user_id = record["account"].user_id
+                if total_cost > 0:
+                    spend_by_user[user_id] = spend_by_user.get(user_id, 0.0) + total_cost
+
+                usage_logs.append(
+                    self._build_usage_log(
+                        api_key=record["api_key"],
+                        account=record["account"],
+                        model_name=record["model_name"],
+                        usage_data=usage_data,
+                        total_cost=total_cost,
+                        request_endpoint=record["request_endpoint"],
+                        request_payload=record["request_payload"],
+                        response_payload=record["response_payload"],
+                        client_ip=record["client_ip"],
+                        processing_time_ms=record["processing_time_ms"],
+                        timestamp=record["timestamp"],
+                        error_message=error_message,
+                    )
+                )
+            except Exception as e:
+                logger.error(f"Failed to prepare usage record: {e}")
+
+        # Atomically update account spending, once per user in the batch
+        for user_id, amount in spend_by_user.items():
+            try:
+                success = await self.account_repo.atomic_spend(user_id, amount)
+                if not success:
+                    logger.error(
+                        f"Failed to atomically update spending for user {user_id}. "
+                        f"Cost: ${amount:.6f}"
+                    )
+                else:
+                    logger.info(f"Billing updated for user {user_id}: ${amount:.6f}")
+
+                    # Invalidate account cache to reflect updated spending
+                    await self.cache_manager.invalidate_account(user_id)
+            except Exception as e:
+                logger.error(f"Error updating spending for user {user_id}: {e}")
+
+        try:
+            await self.usage_repo.create_logs(usage_logs)
+        except Exception as e:
+            logger.error(f"Failed to write {len(usage_logs)} usage logs: {e}")
+
+    @staticmethod
+    def _build_usage_log(
+        api_key: ApiKey,
+        account: Account,
+        model_name: str,
+        usage_data: Dict[str, Any],
+        total_cost: float,
+        request_endpoint: str,
+        request_payload: Dict[str, Any],
+        response_payload: Dict[str, Any],
+        client_ip: Optional[str],
+        processing_time_ms: Optional[float],
+        timestamp: datetime,
+        error_message: Optional[str] = None,
+    ) -> UsageLog:
+        """Build the usage log entry for one billed request"""
+        return UsageLog(
+            user_id=account.user_id,
+            api_key=api_key.api_key,
+            model_name=model_name,
+            is_cache_hit=usage_data.get("is_cache_hit", False),
+            input_tokens=usage_data.get("input_tokens", 0),
+            output_tokens=usage_data.get("output_tokens", 0),
+            cached_tokens=usage_data.get("cached_tokens", 0),
+            cache_creation_tokens=usage_data.get("cache_creation_tokens", 0),
+            total_tokens=usage_data.get("total_tokens", 0),
+            cost_usd=total_cost,
+            request_endpoint=request_endpoint,
+            ip_address=client_ip,
+            request_payload=request_payload,
+            response_payload=response_payload,
+            timestamp=timestamp,
+            processing_time_ms=processing_time_ms,
+            error_message=error_message,
+        )
 
     async def process_usage_and_bill(
         self,
@@ -68,23 +297,18 @@ class BillingManager:
                     await self.cache_manager.invalidate_account(account.user_id)
 
             # Create usage log entry
-            usage_log = UsageLog(
-                user_id=account.user_id,
-                api_key=api_key.api_key,
+            usage_log = self._build_usage_log(
+                api_key=api_key,
+                account=account,
                 model_name=model_name,
-                is_cache_hit=usage_data.get("is_cache_hit", False),
-                input_tokens=usage_data.get("input_tokens", 0),
-                output_tokens=usage_data.get("output_tokens", 0),
-                cached_tokens=usage_data.get("cached_tokens", 0),
-                cache_creation_tokens=usage_data.get("cache_creation_tokens", 0),
-                total_tokens=usage_data.get("total_tokens", 0),
-                cost_usd=total_cost,
+                usage_data=usage_data,
+                total_cost=total_cost,
                 request_endpoint=request_endpoint,
-                ip_address=client_ip,
                 request_payload=request_payload,
                 response_payload=response_payload,
-                timestamp=datetime.utcnow(),
+                client_ip=client_ip,
                 processing_time_ms=processing_time_ms,
+                timestamp=datetime.utcnow(),
             )
 
             # Log usage asynchronously
@@ -48,22 +48,21 @@ class CostCalculator:
 
         # Calculate individual costs
         input_cost = self._calculate_token_cost(
-            input_tokens - cached_tokens, model_cost.input_cost_per_million_tokens_usd
+            input_tokens - cached_tokens, model_cost.input_cost_per_token_usd
         )
 
         output_cost = self._calculate_token_cost(
-            output_tokens, model_cost.output_cost_per_million_tokens_usd
+            output_tokens, model_cost.output_cost_per_token_usd
         )
 
         cache_creation_cost = self._calculate_token_cost(
-            cache_creation_tokens, model_cost.cache_write_cost_per_million_tokens_usd
+            cache_creation_tokens, model_cost.cache_write_cost_per_token_usd
         )
 
-        cached_cost = 0.0
-        if is_cache_hit or cached_tokens > 0:
-            cached_cost = self._calculate_token_cost(
-                cached_tokens, model_cost.cache_hit_cost_per_million_tokens_usd
-            )
+        # Zero cached tokens cost nothing whether or not is_cache_hit is set
+        cached_cost = self._calculate_token_cost(
+            cached_tokens, model_cost.cache_hit_cost_per_token_usd
+        )
 
         total_cost = input_cost + cache_creation_cost + output_cost + cached_cost
 
@@ -94,11 +93,11 @@ class CostCalculator:
 
         return cost_breakdown
 
-    def _calculate_token_cost(self, token_count: int, cost_per_million: float) -> float:
+    def _calculate_token_cost(self, token_count: int, cost_per_token: float) -> float:
         """Calculate cost for a specific number of tokens"""
         if token_count <= 0:
             return 0.0
-        return (token_count / 1_000_000) * cost_per_million
+        return token_count * cost_per_token
 
     async def estimate_cost(
         self,
@@ -119,11 +118,11 @@ class CostCalculator:
             return 0.0
 
         input_cost = self._calculate_token_cost(
-            estimated_input_tokens, model_cost.input_cost_per_million_tokens_usd
+            estimated_input_tokens, model_cost.input_cost_per_token_usd
         )
 
         output_cost = self._calculate_token_cost(
-            estimated_output_tokens, model_cost.output_cost_per_million_tokens_usd
+            estimated_output_tokens, model_cost.output_cost_per_token_usd
         )
 
         return input_cost + output_cost
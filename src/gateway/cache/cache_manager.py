@@ -4,10 +4,10 @@ L1 cache management with Redis pub/sub invalidation
 import json
 import asyncio
 import logging
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List, Set
 from datetime import datetime, timedelta
 from cachetools import TTLCache
-from gateway.models import Account, ApiKey, ModelCost
+from gateway.models import Account, ApiKey, CachedModelCost
 from gateway.database.repositories import AccountRepository, ApiKeyRepository, ModelCostRepository
 from .redis_client import get_redis_client
 
@@ -21,11 +21,22 @@ class CacheManager:
         # L1 Cache - In-memory TTL cache
         self.cache: TTLCache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
 
+        # Model names with no cost configured; kept briefly so unknown models
+        # do not query the database on every request
+        self._model_cost_misses: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
         # Repository instances
         self.account_repo = AccountRepository()
         self.apikey_repo = ApiKeyRepository()
         self.modelcost_repo = ModelCostRepository()
 
+        # Model cost lookups in flight, shared by concurrent misses for a model.
+        # Misses are collected into one batch per event loop pass and fetched
+        # with a single query
+        self._model_cost_inflight: Dict[str, asyncio.Future] = {}
+        self._model_cost_pending: Optional[List[str]] = None
+        self._model_cost_batches: Set[asyncio.Task] = set()
+
         # Redis pub/sub
         self.redis = None
         self.pubsub = None
@@ -71,6 +82,8 @@ class CacheManager:
                         if cache_type and key:
                             cache_key = f"{cache_type}:{key}"
                             self.cache.pop(cache_key, None)
+                            if cache_type == "modelcost":
+                                self._model_cost_misses.pop(key, None)
                             logger.debug(f"Invalidated cache key: {cache_key}")
                     except (json.JSONDecodeError, KeyError) as e:
                         logger.error(f"Failed to process invalidation message: {e}")
@@ -129,7 +142,7 @@ class CacheManager:
 
         return account
 
-    async def get_model_cost(self, model_name: str) -> Optional[ModelCost]:
+    async def get_model_cost(self, model_name: str) -> Optional[CachedModelCost]:
         """Get model cost with caching"""
         cache_key = f"modelcost:{model_name}"
 
@@ -138,14 +151,64 @@ class CacheManager:
         if cached:
             logger.debug(f"Cache hit for model cost: {model_name}")
             return cached
-
-        # L1 cache miss - query database
-        cost = await self.modelcost_repo.get_by_model_name(model_name)
-        if cost:
-            self._set_to_cache(cache_key, cost)
-            logger.debug(f"Loaded model cost from database: {model_name}")
-
-        return cost
+        if model_name in self._model_cost_misses:
+            return None
+
+        # L1 cache miss - join the lookup already pending for this model, or
+        # add it to the next batch
+        future = self._model_cost_inflight.get(model_name)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._model_cost_inflight[model_name] = future
+            if self._model_cost_pending is None:
+                self._model_cost_pending = []
+                task = asyncio.create_task(
+                    self._fetch_model_cost_batch(self._model_cost_pending)
+                )
+                self._model_cost_batches.add(task)
+                task.add_done_callback(self._model_cost_batches.discard)
+            self._model_cost_pending.append(model_name)
+
+        # Shielded so one cancelled caller does not cancel the others
+        return await asyncio.shield(future)
+
+    async def _fetch_model_cost_batch(self, model_names: List[str]):
+        """Load a batch of missed model costs and resolve their waiters"""
+        try:
+            # Let the misses raised in this loop pass join the batch first
+            await asyncio.sleep(0)
+            self._model_cost_pending = None
+            loaded = await self.modelcost_repo.get_many_by_names(model_names)
+            # Only the rates are kept, in a slotted object much smaller than
+            # the pydantic document model
+            costs = {
+                model_name: CachedModelCost.from_model_cost(cost)
+                for model_name, cost in loaded.items()
+            }
+        except asyncio.CancelledError:
+            if self._model_cost_pending is model_names:
+                self._model_cost_pending = None
+            for model_name in model_names:
+                self._model_cost_inflight.pop(model_name).cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load model costs for {model_names}: {e}")
+            for model_name in model_names:
+                future = self._model_cost_inflight.pop(model_name)
+                future.set_exception(e)
+                # Retrieved here so it is never reported as unhandled when
+                # every caller has gone
+                future.exception()
+            return
+
+        for model_name in model_names:
+            cost = costs.get(model_name)
+            if cost:
+                self._set_to_cache(f"modelcost:{model_name}", cost)
+                logger.debug(f"Loaded model cost from database: {model_name}")
+            else:
+                self._model_cost_misses[model_name] = True
+            self._model_cost_inflight.pop(model_name).set_result(cost)
 
     async def invalidate_api_key(self, api_key: str):
         """Invalidate API key cache across all instances"""
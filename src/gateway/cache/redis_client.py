@@ -12,7 +12,9 @@ _redis_client: redis.Redis = None
 async def connect_to_redis():
     """Initialize Redis connection"""
     global _redis_client
-    _redis_client = redis.from_url(settings.redis_url)
+    _redis_client = redis.from_url(
+        settings.redis_url, max_connections=settings.redis_max_connections
+    )
 
 
 async def close_redis_connection():
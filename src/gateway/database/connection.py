@@ -14,7 +14,11 @@ _database: AsyncIOMotorDatabase = None
 async def connect_to_mongo():
     """Initialize MongoDB connection"""
     global _db_client, _database
-    _db_client = motor.motor_asyncio.AsyncIOMotorClient(settings.mongo_uri)
+    _db_client = motor.motor_asyncio.AsyncIOMotorClient(
+        settings.mongo_uri,
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+    )
     _database = _db_client[settings.mongo_db_name]
 
     # Create indexes
@@ -4,6 +4,7 @@ Database repository classes for data access
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
 from gateway.models import Account, ApiKey, ModelCost, UsageLog
 from .connection import get_collection
 
@@ -126,11 +127,35 @@ class ModelCostRepository(BaseRepository):
         )
         return ModelCost(**result)
 
+    async def bulk_upsert_costs(self, model_costs: List[ModelCost]) -> None:
+        """Create or update many model cost configurations in one round trip"""
+        if not model_costs:
+            return
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"model_name": model_cost.model_name},
+                    {"$set": model_cost.model_dump(by_alias=True, exclude={"id"})},
+                    upsert=True,
+                )
+                for model_cost in model_costs
+            ],
+            ordered=False,
+        )
+
     async def get_by_model_name(self, model_name: str) -> Optional[ModelCost]:
         """Get model cost by model name"""
         doc = await self.collection.find_one({"model_name": model_name})
         return ModelCost(**doc) if doc else None
 
+    async def get_many_by_names(self, model_names: List[str]) -> Dict[str, ModelCost]:
+        """Get the model costs for several model names in one query"""
+        cursor = self.collection.find({"model_name": {"$in": model_names}})
+        costs = {}
+        async for doc in cursor:
+            costs[doc["model_name"]] = ModelCost(**doc)
+        return costs
+
     async def list_all_costs(self) -> List[ModelCost]:
         """Get all model costs"""
         cursor = self.collection.find()
@@ -158,6 +183,15 @@ class UsageLogRepository(BaseRepository):
         usage_log.id = result.inserted_id
         return usage_log
 
+    async def create_logs(self, usage_logs: List[UsageLog]) -> None:
+        """Insert many usage log entries in one round trip"""
+        if not usage_logs:
+            return
+        await self.collection.insert_many(
+            [log.model_dump(by_alias=True, exclude={"id"}) for log in usage_logs],
+            ordered=False,
+        )
+
     async def get_user_logs(
         self,
         user_id: str,
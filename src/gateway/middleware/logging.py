@@ -14,7 +14,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware to log request details and response times"""
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+        start_time = time.perf_counter()
         client_ip = request.client.host if request.client else "unknown"
 
         # Log request start
@@ -26,7 +26,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
 
         # Calculate processing time
-        process_time = (time.time() - start_time) * 1000
+        process_time = (time.perf_counter() - start_time) * 1000
 
         # Log request completion
         logger.info(
@@ -3,7 +3,7 @@ Data models for the LLM Gateway
 """
 from .account import Account
 from .api_key import ApiKey
-from .model_cost import ModelCost
+from .model_cost import CachedModelCost, ModelCost
 from .usage_log import UsageLog
 from .base import MongoBaseModel, BudgetDuration
 
@@ -11,6 +11,7 @@ __all__ = [
     "Account",
     "ApiKey",
     "ModelCost",
+    "CachedModelCost",
     "UsageLog",
     "MongoBaseModel",
     "BudgetDuration"
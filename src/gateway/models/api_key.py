@@ -2,7 +2,8 @@
 API Key model for authentication
 """
 from datetime import datetime
-from typing import List, Optional
+from functools import cached_property
+from typing import FrozenSet, List, Optional
 from pydantic import Field
 from .base import MongoBaseModel
 
@@ -32,4 +33,9 @@ class ApiKey(MongoBaseModel):
             return False
         if self.allowed_models is None:
             return True  # All models allowed
-        return model_name in self.allowed_models
\ No newline at end of file
+        return model_name in self.allowed_model_set
+
+    @cached_property
+    def allowed_model_set(self) -> FrozenSet[str]:
+        """allowed_models as a set, built once per loaded key"""
+        return frozenset(self.allowed_models or ())
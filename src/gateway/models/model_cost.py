@@ -2,7 +2,9 @@
 Model cost configuration
 """
 
+from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property
 
 from pydantic import Field
 
@@ -39,11 +41,55 @@ class ModelCost(MongoBaseModel):
         To use cached write tokens pricing, the usage tracking system
         needs to be updated to differentiate between read and write cached tokens.
         """
-        input_cost = (input_tokens / 1_000_000) * self.input_cost_per_million_tokens_usd
-        output_cost = (
-            output_tokens / 1_000_000
-        ) * self.output_cost_per_million_tokens_usd
-        cached_cost = (
-            cached_tokens / 1_000_000
-        ) * self.cache_hit_cost_per_million_tokens_usd
+        input_cost = input_tokens * self.input_cost_per_token_usd
+        output_cost = output_tokens * self.output_cost_per_token_usd
+        cached_cost = cached_tokens * self.cache_hit_cost_per_token_usd
         return input_cost + output_cost + cached_cost
+
+    # Per-token rates, scaled once per loaded cost configuration
+
+    @cached_property
+    def input_cost_per_token_usd(self) -> float:
+        return self.input_cost_per_million_tokens_usd * 1e-6
+
+    @cached_property
+    def output_cost_per_token_usd(self) -> float:
+        return self.output_cost_per_million_tokens_usd * 1e-6
+
+    @cached_property
+    def cache_hit_cost_per_token_usd(self) -> float:
+        return self.cache_hit_cost_per_million_tokens_usd * 1e-6
+
+    @cached_property
+    def cache_write_cost_per_token_usd(self) -> float:
+        return self.cache_write_cost_per_million_tokens_usd * 1e-6
+
+
+@dataclass(frozen=True, slots=True)
+class CachedModelCost:
+    """Compact, read-only model cost held in the L1 cache for billing"""
+
+    model_name: str
+    input_cost_per_million_tokens_usd: float
+    output_cost_per_million_tokens_usd: float
+    cache_hit_cost_per_million_tokens_usd: float
+    cache_write_cost_per_million_tokens_usd: float
+    input_cost_per_token_usd: float
+    output_cost_per_token_usd: float
+    cache_hit_cost_per_token_usd: float
+    cache_write_cost_per_token_usd: float
+
+    @classmethod
+    def from_model_cost(cls, model_cost: ModelCost) -> "CachedModelCost":
+        """Project a loaded ModelCost onto its rates"""
+        return cls(
+            model_name=model_cost.model_name,
+            input_cost_per_million_tokens_usd=model_cost.input_cost_per_million_tokens_usd,
+            output_cost_per_million_tokens_usd=model_cost.output_cost_per_million_tokens_usd,
+            cache_hit_cost_per_million_tokens_usd=model_cost.cache_hit_cost_per_million_tokens_usd,
+            cache_write_cost_per_million_tokens_usd=model_cost.cache_write_cost_per_million_tokens_usd,
+            input_cost_per_token_usd=model_cost.input_cost_per_token_usd,
+            output_cost_per_token_usd=model_cost.output_cost_per_token_usd,
+            cache_hit_cost_per_token_usd=model_cost.cache_hit_cost_per_token_usd,
+            cache_write_cost_per_token_usd=model_cost.cache_write_cost_per_token_usd,
+        )
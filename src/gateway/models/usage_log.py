@@ -2,6 +2,7 @@
 Usage log model for audit trails
 """
 
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, Optional
 
@@ -10,16 +11,19 @@ from pydantic import Field
 from .base import MongoBaseModel
 
 
-class UsageData(MongoBaseModel):
-    input_tokens: int
-    output_tokens: int
-    cached_tokens: int
-    cache_creation_tokens: int
-    total_tokens: int
+@dataclass(slots=True)
+class UsageData:
+    """Token usage reported by an upstream provider"""
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.total_tokens = (
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Total tokens, kept in sync as streaming updates the counters"""
+        return (
             self.input_tokens
             + self.output_tokens
             + self.cached_tokens
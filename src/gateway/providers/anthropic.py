@@ -1,30 +1,167 @@
-import asyncio
-import json
 import logging
 import os
-from typing import Any, AsyncGenerator, Dict, Tuple, Union
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional, Tuple, Union
 
 import aiohttp
+import orjson
 
 from gateway.models.usage_log import UsageData
+from gateway.utils.streams import coalesce_stream
 
 from .base import BaseProvider
 
 logger = logging.getLogger(__name__)
 
+# Shared read-only fallback for responses without a usage object
+_EMPTY_USAGE: Dict[str, Any] = {}
+
+# Already-received stream events are coalesced into downstream writes of up
+# to this many bytes
+_STREAM_FLUSH_BYTES = 16384
+
+_SSE_DATA_PREFIX = b"data: "
+_SSE_CONTENT_BLOCK_EVENT = b"event: content_block"
+
+
+def _find_sse_data(frame: bytes, track_content: bool = True) -> Optional[memoryview]:
+    """
+    Locate the payload of the first 'data: ' line in a raw SSE frame
+
+    Returns a zero-copy view of the payload, or None when the frame has no
+    data line or is a content block event that is not being tracked.
+    """
+    view = memoryview(frame)
+    pos = 0
+    end = len(frame)
+
+    while pos < end:
+        line_end = frame.find(b"\n", pos)
+        if line_end == -1:
+            line_end = end
+
+        if frame.startswith(_SSE_DATA_PREFIX, pos):
+            data_end = line_end
+            if data_end > pos and frame[data_end - 1] == 0x0D:  # strip '\r'
+                data_end -= 1
+            # Anthropic emits a single data line per event
+            return view[pos + 6:data_end]
+
+        if not track_content and frame.startswith(_SSE_CONTENT_BLOCK_EVENT, pos):
+            # Content block events only feed complete_message['content']
+            return None
+
+        pos = line_end + 1
+
+    return None
+
+
+def _encode_payload(request_data: Dict[str, Any], stream: bool) -> bytes:
+    """
+    Serialize request_data as JSON with its 'stream' flag set to the given value
+
+    The request dict is neither copied nor mutated in the common cases: when
+    'stream' already has the wanted value it is serialized as-is, and when it
+    is absent the flag is spliced onto the end of the encoded object.
+    """
+    if "stream" in request_data:
+        if request_data["stream"] is stream:
+            return orjson.dumps(request_data)
+        return orjson.dumps({**request_data, "stream": stream})
+
+    body = orjson.dumps(request_data)
+    flag = b'"stream":true}' if stream else b'"stream":false}'
+    if body == b"{}":
+        return b"{" + flag
+    return body[:-1] + b"," + flag
+
+
+async def _iter_sse_frames(content: aiohttp.StreamReader) -> AsyncIterator[bytes]:
+    """Yield raw SSE event frames read from upstream"""
+    frame = bytearray()
+
+    try:
+        while True:
+            line = await content.readline()
+            if not line:
+                break
+
+            frame += line
+            if line == b'\n' or line == b'\r\n':
+                # Empty line indicates end of SSE event
+                if len(frame) > len(line):
+                    yield bytes(frame)
+                frame.clear()
+
+    except Exception as e:
+        logger.error(f"Error reading SSE stream: {e}")
+
+    # Handle any remaining event
+    if frame:
+        if not frame.endswith(b'\n'):
+            frame += b'\n'
+        frame += b'\n'
+        yield bytes(frame)
+
+
+class AnthropicAPIError(Exception):
+    """Non-200 response from the Anthropic API"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Anthropic API error ({status}): {message}")
+        self.status = status
+
 
 class AnthropicProvider(BaseProvider):
     def __init__(self):
         base_url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
         api_key = os.getenv("ANTHROPIC_API_KEY")
         super().__init__(base_url=base_url, api_key=api_key)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Request headers and endpoints never change after startup
+        self._headers = {
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key or "",
+            "anthropic-version": "2023-06-01",
+        }
+        self._messages_url = f"{self.base_url}/v1/messages"
+        self._count_tokens_url = f"{self.base_url}/v1/messages/count_tokens"
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0, use_dns_cache=True, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _headers_for(self, body: bytes) -> Dict[str, str]:
+        """Request headers with an explicit Content-Length for the encoded body"""
+        return {**self._headers, "Content-Length": str(len(body))}
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def forward_messages(
-        self, request_data: Dict[str, Any], stream: bool = False
-    ) -> Union[Dict[str, Any], Tuple[AsyncGenerator[str, None], UsageData, Dict[str, Any]]]:
+        self,
+        request_data: Dict[str, Any],
+        stream: bool = False,
+        track_content: bool = False,
+    ) -> Union[Dict[str, Any], Tuple[AsyncGenerator[bytes, None], UsageData, Dict[str, Any]]]:
         """
         Forward request to Anthropic Messages API
 
+        Args:
+            request_data: The request payload forwarded to Anthropic
+            stream: Whether to request a streaming response
+            track_content: For streaming, also rebuild content blocks into
+                complete_message; usage/id/model/stop_reason are always tracked
+
         Returns:
             For non-streaming: Dict containing the response
             For streaming: Tuple of (stream_generator, usage_data, complete_message)
@@ -32,38 +169,75 @@ class AnthropicProvider(BaseProvider):
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not configured")
 
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01"
-        }
-
-        url = f"{self.base_url}/v1/messages"
-
-        # Set stream parameter
-        payload = {**request_data, "stream": stream}
+        # Serialize once with the stream parameter set
+        body = _encode_payload(request_data, stream)
 
         if stream:
-            return await self._handle_streaming_request(url, headers, payload)
+            return await self._handle_streaming_request(
+                self._messages_url,
+                self._headers_for(body),
+                body,
+                model=request_data.get("model", ""),
+                track_content=track_content,
+            )
         else:
-            return await self._handle_non_streaming_request(url, headers, payload)
+            return await self._handle_non_streaming_request(
+                self._messages_url, self._headers_for(body), body
+            )
 
     async def _handle_non_streaming_request(
-        self, url: str, headers: Dict[str, str], payload: Dict[str, Any]
+        self, url: str, headers: Dict[str, str], body: bytes
     ) -> Dict[str, Any]:
         """Handle non-streaming request"""
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Anthropic API error ({response.status}): {error_text}")
+        session = self._get_session()
+        async with session.post(url, headers=headers, data=body) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise AnthropicAPIError(response.status, error_text)
+
+            response_data = await response.json()
+            return response_data
+
+    async def forward_messages_passthrough(
+        self, request_data: Dict[str, Any]
+    ) -> Tuple[bytes, int, str]:
+        """
+        Forward a non-streaming request and return the upstream body undecoded
+
+        Returns:
+            Tuple of (body, status_code, content_type) ready to be sent to the
+            client as-is
+        """
+        if not self.api_key:
+            raise ValueError("ANTHROPIC_API_KEY not configured")
 
-                response_data = await response.json()
-                return response_data
+        body = _encode_payload(request_data, False)
+        return await self._handle_non_streaming_passthrough(
+            self._messages_url, self._headers_for(body), body
+        )
+
+    async def _handle_non_streaming_passthrough(
+        self, url: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[bytes, int, str]:
+        """Handle non-streaming request without deserializing the response"""
+        session = self._get_session()
+        async with session.post(url, headers=headers, data=body) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise AnthropicAPIError(response.status, error_text)
+
+            content = await response.read()
+            content_type = response.headers.get("Content-Type", "application/json")
+            return content, response.status, content_type
 
     async def _handle_streaming_request(
-        self, url: str, headers: Dict[str, str], payload: Dict[str, Any]
-    ) -> Tuple[AsyncGenerator[str, None], UsageData, Dict[str, Any]]:
+        self,
+        url: str,
+        headers: Dict[str, str],
+        body: bytes,
+        model: str = "",
+        track_content: bool = False,
+    ) -> Tuple[AsyncGenerator[bytes, None], UsageData, Dict[str, Any]]:
         """Handle streaming request and extract usage data"""
 
         # Variables to accumulate streaming data
@@ -78,178 +252,168 @@ class AnthropicProvider(BaseProvider):
             "type": "message",
             "role": "assistant",
             "content": [],
-            "model": payload.get("model", ""),
+            "model": model,
             "stop_reason": None,
             "stop_sequence": None,
             "usage": {}
         }
 
-        async def stream_generator():
-            nonlocal accumulated_usage, complete_message
+        current_content_block = None
+
+        def track_event(frame: bytes) -> bool:
+            """Update usage and complete_message from one SSE frame, False once done"""
+            nonlocal current_content_block
+
+            data = _find_sse_data(frame, track_content)
+            if data is None:
+                return True
+            if data == b'[DONE]':
+                return False
+
+            try:
+                event_data = orjson.loads(data)
+                event_type = event_data.get('type')
+
+                # Process different event types
+                if event_type == 'message_start':
+                    message = event_data.get('message', {})
+                    # Keys already exist in complete_message, so plain stores
+                    # never resize it
+                    complete_message['id'] = message.get('id', '')
+                    complete_message['model'] = message.get('model', '')
+                    complete_message['role'] = message.get('role', 'assistant')
+                    complete_message['content'] = message.get('content', [])
+                    complete_message['stop_reason'] = message.get('stop_reason')
+                    complete_message['stop_sequence'] = message.get('stop_sequence')
+                    complete_message['usage'] = message.get('usage', {})
+
+                    # Extract initial usage from message_start if present
+                    initial_usage = message.get('usage') or _EMPTY_USAGE
+                    if initial_usage:
+                        accumulated_usage.input_tokens = initial_usage.get('input_tokens', 0)
+                        accumulated_usage.output_tokens = initial_usage.get('output_tokens', 0)
+                        accumulated_usage.cached_tokens = initial_usage.get('cache_read_input_tokens', 0)
+                        accumulated_usage.cache_creation_tokens = initial_usage.get('cache_creation_input_tokens', 0)
+
+                elif not track_content and event_type in (
+                    'content_block_start',
+                    'content_block_delta',
+                    'content_block_stop',
+                ):
+                    # Content is not tracked for this stream
+                    pass
+
+                elif event_type == 'content_block_start':
+                    content_block = event_data.get('content_block', {})
+                    block_type = content_block.get('type', 'text')
+
+                    if block_type == 'text':
+                        current_content_block = {
+                            'type': 'text',
+                            'text': ''
+                        }
+                    elif block_type == 'tool_use':
+                        current_content_block = {
+                            'type': 'tool_use',
+                            'id': content_block.get('id', ''),
+                            'name': content_block.get('name', ''),
+                            'input': {}
+                        }
+                    else:
+                        # Handle other content block types
+                        current_content_block = dict(content_block)
+
+                    complete_message['content'].append(current_content_block)
+
+                elif event_type == 'content_block_delta':
+                    if current_content_block and 'delta' in event_data:
+                        delta = event_data['delta']
+                        delta_type = delta.get('type')
+
+                        if delta_type == 'text_delta' and 'text' in delta:
+                            current_content_block['text'] += delta['text']
+                        elif delta_type == 'input_json_delta' and 'partial_json' in delta:
+                            # Handle tool use input JSON delta
+                            if 'input' not in current_content_block:
+                                current_content_block['input'] = {}
+                            # Note: For complete JSON reconstruction, need proper JSON streaming parser
+                            # For now, just track that we received input delta
+                            pass
+                        elif delta_type == 'thinking_delta' and 'text' in delta:
+                            # Handle thinking/reasoning delta
+                            if 'thinking' not in current_content_block:
+                                current_content_block['thinking'] = ''
+                            current_content_block['thinking'] += delta['text']
+
+                elif event_type == 'content_block_stop':
+                    current_content_block = None
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Anthropic API error ({response.status}): {error_text}")
+                elif event_type == 'message_delta':
+                    delta = event_data.get('delta', {})
+                    if 'stop_reason' in delta:
+                        complete_message['stop_reason'] = delta['stop_reason']
+                    if 'stop_sequence' in delta:
+                        complete_message['stop_sequence'] = delta['stop_sequence']
 
-                    current_content_block = None
+                    # Extract usage data from message_delta (cumulative)
+                    usage = event_data.get('usage') or _EMPTY_USAGE
+                    if usage:
+                        # Update accumulated usage (handle multiple message_delta events)
+                        accumulated_usage.input_tokens = usage.get('input_tokens', accumulated_usage.input_tokens)
+                        accumulated_usage.output_tokens = usage.get('output_tokens', accumulated_usage.output_tokens)
+                        accumulated_usage.cached_tokens = usage.get('cache_read_input_tokens', accumulated_usage.cached_tokens)
+                        accumulated_usage.cache_creation_tokens = usage.get('cache_creation_input_tokens', accumulated_usage.cache_creation_tokens)
+                        complete_message['usage'] = usage
+
+                elif event_type == 'message_stop':
+                    # Final event, stream is complete
+                    pass
+
+                elif event_type == 'ping':
+                    # Heartbeat event, no processing needed
+                    pass
 
-                    current_event_lines = []
-
-                    while True:
-                        try:
-                            line_bytes = await response.content.readline()
-                            if not line_bytes:
-                                break
-
-                            line = line_bytes.decode('utf-8').rstrip('\r\n')
-
-                            if not line:
-                                # Empty line indicates end of SSE event
-                                if current_event_lines:
-                                    # Forward the complete event as-is
-                                    event_text = '\n'.join(current_event_lines) + '\n\n'
-                                    yield event_text
-
-                                    # Process data line for internal tracking
-                                    data_line = None
-                                    for event_line in current_event_lines:
-                                        if event_line.startswith('data: '):
-                                            data_line = event_line
-                                            break
-
-                                    if data_line:
-                                        if data_line == 'data: [DONE]':
-                                            return
-
-                                        try:
-                                            event_data = json.loads(data_line[6:])  # Remove 'data: ' prefix
-                                            event_type = event_data.get('type')
-
-                                            # Process different event types
-                                            if event_type == 'message_start':
-                                                message = event_data.get('message', {})
-                                                complete_message.update({
-                                                    'id': message.get('id', ''),
-                                                    'model': message.get('model', ''),
-                                                    'role': message.get('role', 'assistant'),
-                                                    'content': message.get('content', []),
-                                                    'stop_reason': message.get('stop_reason'),
-                                                    'stop_sequence': message.get('stop_sequence'),
-                                                    'usage': message.get('usage', {})
-                                                })
-
-                                                # Extract initial usage from message_start if present
-                                                initial_usage = message.get('usage', {})
-                                                if initial_usage:
-                                                    accumulated_usage.input_tokens = initial_usage.get('input_tokens', 0)
-                                                    accumulated_usage.output_tokens = initial_usage.get('output_tokens', 0)
-                                                    accumulated_usage.cached_tokens = initial_usage.get('cache_read_input_tokens', 0)
-                                                    accumulated_usage.cache_creation_tokens = initial_usage.get('cache_creation_input_tokens', 0)
-
-                                            elif event_type == 'content_block_start':
-                                                content_block = event_data.get('content_block', {})
-                                                block_type = content_block.get('type', 'text')
-
-                                                if block_type == 'text':
-                                                    current_content_block = {
-                                                        'type': 'text',
-                                                        'text': ''
-                                                    }
-                                                elif block_type == 'tool_use':
-                                                    current_content_block = {
-                                                        'type': 'tool_use',
-                                                        'id': content_block.get('id', ''),
-                                                        'name': content_block.get('name', ''),
-                                                        'input': {}
-                                                    }
-                                                else:
-                                                    # Handle other content block types
-                                                    current_content_block = dict(content_block)
-
-                                                complete_message['content'].append(current_content_block)
-
-                                            elif event_type == 'content_block_delta':
-                                                if current_content_block and 'delta' in event_data:
-                                                    delta = event_data['delta']
-                                                    delta_type = delta.get('type')
-
-                                                    if delta_type == 'text_delta' and 'text' in delta:
-                                                        current_content_block['text'] += delta['text']
-                                                    elif delta_type == 'input_json_delta' and 'partial_json' in delta:
-                                                        # Handle tool use input JSON delta
-                                                        if 'input' not in current_content_block:
-                                                            current_content_block['input'] = {}
-                                                        # Note: For complete JSON reconstruction, need proper JSON streaming parser
-                                                        # For now, just track that we received input delta
-                                                        pass
-                                                    elif delta_type == 'thinking_delta' and 'text' in delta:
-                                                        # Handle thinking/reasoning delta
-                                                        if 'thinking' not in current_content_block:
-                                                            current_content_block['thinking'] = ''
-                                                        current_content_block['thinking'] += delta['text']
-
-                                            elif event_type == 'content_block_stop':
-                                                current_content_block = None
-
-                                            elif event_type == 'message_delta':
-                                                delta = event_data.get('delta', {})
-                                                if 'stop_reason' in delta:
-                                                    complete_message['stop_reason'] = delta['stop_reason']
-                                                if 'stop_sequence' in delta:
-                                                    complete_message['stop_sequence'] = delta['stop_sequence']
-
-                                                # Extract usage data from message_delta (cumulative)
-                                                usage = event_data.get('usage', {})
-                                                if usage:
-                                                    # Update accumulated usage (handle multiple message_delta events)
-                                                    accumulated_usage.input_tokens = usage.get('input_tokens', accumulated_usage.input_tokens)
-                                                    accumulated_usage.output_tokens = usage.get('output_tokens', accumulated_usage.output_tokens)
-                                                    accumulated_usage.cached_tokens = usage.get('cache_read_input_tokens', accumulated_usage.cached_tokens)
-                                                    accumulated_usage.cache_creation_tokens = usage.get('cache_creation_input_tokens', accumulated_usage.cache_creation_tokens)
-                                                    complete_message['usage'] = usage
-
-                                            elif event_type == 'message_stop':
-                                                # Final event, stream is complete
-                                                pass
-
-                                            elif event_type == 'ping':
-                                                # Heartbeat event, no processing needed
-                                                pass
-
-                                            elif event_type == 'error':
-                                                # Error event
-                                                error_info = event_data.get('error', {})
-                                                logger.error(f"Anthropic streaming error: {error_info}")
-
-                                            else:
-                                                # Unknown event type - log for debugging
-                                                logger.warning(f"Unknown event type: {event_type}")
-
-                                        except json.JSONDecodeError as e:
-                                            logger.warning(f"Failed to parse streaming event: {e}")
-
-                                    current_event_lines = []
-                                continue
-
-                            # Accumulate lines for current event
-                            current_event_lines.append(line)
-
-                        except Exception as e:
-                            logger.error(f"Error reading SSE stream: {e}")
-                            break
-
-                    # Handle any remaining event
-                    if current_event_lines:
-                        event_text = '\n'.join(current_event_lines) + '\n\n'
-                        yield event_text
+                elif event_type == 'error':
+                    # Error event
+                    error_info = event_data.get('error', {})
+                    logger.error(f"Anthropic streaming error: {error_info}")
+
+                else:
+                    # Unknown event type - log for debugging
+                    logger.warning(f"Unknown event type: {event_type}")
+
+
+            except orjson.JSONDecodeError as e:
+                logger.warning(f"Failed to parse streaming event: {e}")
+
+            return True
+
+        async def stream_generator():
+            session = self._get_session()
+            async with session.post(url, headers=headers, data=body) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise AnthropicAPIError(response.status, error_text)
+
+                # Each complete event is forwarded as-is
+                def write(frame: bytes, out: bytearray) -> bool:
+                    out += frame
+                    return track_event(frame)
+
+                batches = coalesce_stream(
+                    _iter_sse_frames(response.content),
+                    write,
+                    max_bytes=_STREAM_FLUSH_BYTES,
+                )
+                async with aclosing(batches):
+                    async for chunk in batches:
+                        yield chunk
 
         return stream_generator(), accumulated_usage, complete_message
 
     def extract_usage_from_response(self, response: Dict[str, Any]) -> UsageData:
         """Extract usage data from non-streaming response"""
-        usage = response.get('usage', {})
+        usage = response.get('usage') or _EMPTY_USAGE
 
         return UsageData(
             input_tokens=usage.get('input_tokens', 0),
@@ -271,24 +435,16 @@ class AnthropicProvider(BaseProvider):
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not configured")
 
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01"
-        }
-
-        url = f"{self.base_url}/v1/messages/count_tokens"
-
-        # Create payload for token counting
-        payload = dict(request_data)
         # Ensure stream is False for token counting
-        payload["stream"] = False
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Anthropic API error ({response.status}): {error_text}")
-
-                response_data = await response.json()
-                return response_data
+        body = _encode_payload(request_data, False)
+
+        session = self._get_session()
+        async with session.post(
+            self._count_tokens_url, headers=self._headers_for(body), data=body
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise AnthropicAPIError(response.status, error_text)
+
+            response_data = await response.json()
+            return response_data
@@ -1,3 +1,10 @@
+from typing import Optional
+
+
 class BaseProvider:
     base_url: str
-    api_key: str
+    api_key: Optional[str]
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None):
+        self.base_url = base_url
+        self.api_key = api_key
@@ -2,14 +2,17 @@
 LiteLLM client wrapper for provider routing
 """
 
+import functools
 import logging
 import os
+from collections.abc import Mapping
 from enum import Enum
-from typing import Any, AsyncGenerator, Dict, Union
+from types import MappingProxyType
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Union
 
+import httpx
 import litellm
 from litellm import CustomStreamWrapper, ModelResponse
-from litellm.types.utils import PromptTokensDetailsWrapper
 
 logger = logging.getLogger(__name__)
 
@@ -26,92 +29,97 @@ class Provider(str, Enum):
     ANTHROPIC = "anthropic"
 
 
+_OPENAI_ENDPOINT_SUFFIXES = ("/chat/completions", "/responses")
+_ANTHROPIC_ENDPOINT_SUFFIXES = ("/messages", "/messages/count_tokens")
+
+
 class LiteLLMClient:
     """Wrapper for LiteLLM with provider routing"""
 
-    def __init__(self):
-        self.provider_configs = {
-            Provider.OPENAI: {
-                "api_key": os.getenv("OPENAI_API_KEY"),
-                "api_base": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
-            },
-            Provider.ANTHROPIC: {
-                "api_key": os.getenv("ANTHROPIC_API_KEY"),
-                "api_base": os.getenv(
-                    "ANTHROPIC_BASE_URL", "https://api.anthropic.com"
-                ),
-            },
-        }
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        if http_client is not None:
+            # LiteLLM builds its OpenAI-compatible SDK clients on this session,
+            # so upstream connections are pooled instead of set up per client
+            litellm.aclient_session = http_client
+
+        env = os.environ
+        self._openai_key = env.get("OPENAI_API_KEY")
+        self._openai_base = env.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        self._anthropic_key = env.get("ANTHROPIC_API_KEY")
+        self._anthropic_base = env.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+
+        # Constant litellm.acompletion kwargs per provider; providers without
+        # an API key are left out so completion() can reject them with one lookup
+        self._provider_kwargs: Dict[Provider, Mapping[str, str]] = {}
+        for provider, api_key, api_base in (
+            (Provider.OPENAI, self._openai_key, self._openai_base),
+            (Provider.ANTHROPIC, self._anthropic_key, self._anthropic_base),
+        ):
+            if not api_key:
+                logger.warning(f"API key not configured for provider {provider}")
+                continue
+            kwargs = {"api_key": api_key}
+            if api_base:
+                kwargs["api_base"] = api_base
+            # Shared by every request, so exposed read-only
+            self._provider_kwargs[provider] = MappingProxyType(kwargs)
 
     def get_provider_from_endpoint(self, endpoint: str) -> Provider:
         """Determine provider based on endpoint path"""
-        endpoint_lower = endpoint.lower()
-
-        if "/chat/completions" in endpoint_lower or "/responses" in endpoint_lower:
+        # Endpoints are the fixed lowercase route paths from gateway.api.routes
+        if endpoint.endswith(_OPENAI_ENDPOINT_SUFFIXES):
             return Provider.OPENAI
-        elif "/messages" in endpoint_lower:
+        elif endpoint.endswith(_ANTHROPIC_ENDPOINT_SUFFIXES):
             return Provider.ANTHROPIC
         else:
             # Default to OpenAI for unknown endpoints
             logger.warning(f"Unknown endpoint {endpoint}, defaulting to OpenAI")
             return Provider.OPENAI
 
-    def _get_provider_config(self, provider: Provider) -> Dict[str, str]:
-        """Get configuration for the specified provider"""
-        config = self.provider_configs.get(provider)
-        if not config:
-            raise ValueError(f"Provider {provider} not configured")
-
-        if not config["api_key"]:
-            raise ValueError(f"API key not configured for provider {provider}")
-
-        return config
-
     async def completion(
         self, provider: Provider, request_data: Dict[str, Any], stream: bool = False
     ) -> Union[ModelResponse, AsyncGenerator[str, None]]:
         """
         Execute completion request via LiteLLM
         """
-        config = self._get_provider_config(provider)
-
-        # Prepare arguments for litellm.acompletion
-        litellm_args = {
-            **request_data,  # Pass through all client request data
-            "api_key": config["api_key"],
-            "stream": stream,
-        }
-
-        # Add base URL if configured
-        if config["api_base"]:
-            litellm_args["api_base"] = config["api_base"]
+        provider_kwargs = self._provider_kwargs.get(provider)
+        if provider_kwargs is None:
+            raise ValueError(f"API key not configured for provider {provider}")
 
         try:
             logger.debug(
-                f"Calling LiteLLM with provider {provider}, "
-                f"model: {request_data.get('model')}, stream: {stream}"
+                "Calling LiteLLM with provider %s, model: %s, stream: %s",
+                provider, request_data.get("model"), stream,
             )
 
-            response = await litellm.acompletion(**litellm_args)
+            # Client request data passes through; provider credentials and the
+            # resolved stream flag take precedence over client-supplied values
+            response = await litellm.acompletion(
+                **{**request_data, **provider_kwargs, "stream": stream}
+            )
 
             # Debug response content based on type
-            if isinstance(response, CustomStreamWrapper):
-                logger.debug(
-                    f"#response_debug litellm_client: StreamWrapper(stream={stream}, model={request_data.get('model')})"
-                )
-            elif isinstance(response, ModelResponse):
-                # Extract key info from ModelResponse
-                model = getattr(response, "model", "unknown")
-                choices_count = len(getattr(response, "choices", []))
-                usage = getattr(response, "usage", None)
-                usage_info = f"usage={usage}" if usage else "no_usage"
-                logger.debug(
-                    f"#response_debug litellm_client: ModelResponse(model={model}, choices={choices_count}, {usage_info})"
-                )
-            else:
-                logger.debug(
-                    f"#response_debug litellm_client: {type(response).__name__}({response})"
-                )
+            if logger.isEnabledFor(logging.DEBUG):
+                if isinstance(response, CustomStreamWrapper):
+                    logger.debug(
+                        "#response_debug litellm_client: StreamWrapper(stream=%s, model=%s)",
+                        stream, request_data.get("model"),
+                    )
+                elif isinstance(response, ModelResponse):
+                    # Extract key info from ModelResponse
+                    model = getattr(response, "model", "unknown")
+                    choices_count = len(getattr(response, "choices", []))
+                    usage = getattr(response, "usage", None)
+                    usage_info = f"usage={usage}" if usage else "no_usage"
+                    logger.debug(
+                        "#response_debug litellm_client: ModelResponse(model=%s, choices=%s, %s)",
+                        model, choices_count, usage_info,
+                    )
+                else:
+                    logger.debug(
+                        "#response_debug litellm_client: %s(%s)",
+                        type(response).__name__, response,
+                    )
 
             return response
 
@@ -121,76 +129,61 @@ class LiteLLMClient:
 
     def extract_usage_from_response(self, response: ModelResponse) -> Dict[str, Any]:
         """Extract usage information from LiteLLM response"""
-        usage_data = {
-            "input_tokens": 0,
-            "output_tokens": 0,
-            "cached_tokens": 0,
-            "cache_creation_tokens": 0,
-            "total_tokens": 0,
-            "is_cache_hit": False,
-        }
-
-        if hasattr(response, "usage") and response.usage:
-            # PromptTokensDetailsWrapper
-
-            usage_data.update(
-                {
-                    "input_tokens": getattr(response.usage, "prompt_tokens", 0),
-                    "output_tokens": getattr(response.usage, "completion_tokens", 0),
-                    "total_tokens": getattr(response.usage, "total_tokens", 0),
-                }
-            )
-
-            prompt_tokens_details: PromptTokensDetailsWrapper = getattr(
-                response.usage, "prompt_tokens_details", PromptTokensDetailsWrapper()
-            )
-            usage_data["cached_tokens"] = prompt_tokens_details.cached_tokens
-            usage_data["cache_creation_tokens"] = (
-                prompt_tokens_details.cache_creation_tokens
-            )
-
-        # Check for cache hit (LiteLLM specific)
-        if hasattr(response, "_cache_hit"):
-            usage_data["is_cache_hit"] = response._cache_hit
-
-        return usage_data
+        return _usage_extractor_for(type(response))(response)
 
     def extract_usage_from_stream(
         self, stream_wrapper: CustomStreamWrapper
     ) -> Dict[str, Any]:
         """Extract usage information from completed stream"""
-        usage_data = {
-            "input_tokens": 0,
-            "output_tokens": 0,
-            "cached_tokens": 0,
-            "cache_creation_tokens": 0,
-            "total_tokens": 0,
-            "is_cache_hit": False,
-        }
-
         # For streaming responses, usage info is available after the stream completes
-        if hasattr(stream_wrapper, "usage") and stream_wrapper.usage:
-            usage_data.update(
-                {
-                    "input_tokens": getattr(stream_wrapper.usage, "prompt_tokens", 0),
-                    "output_tokens": getattr(
-                        stream_wrapper.usage, "completion_tokens", 0
-                    ),
-                    "total_tokens": getattr(stream_wrapper.usage, "total_tokens", 0),
-                }
-            )
-
-            prompt_tokens_details = getattr(
-                stream_wrapper.usage,
-                "prompt_tokens_details",
-                PromptTokensDetailsWrapper(),
-            )
-            usage_data["cached_tokens"] = prompt_tokens_details.cached_tokens
+        return _extract_usage(stream_wrapper)
+
+
+def _extract_usage(source: Any) -> Dict[str, Any]:
+    """Build the billing usage dict from a LiteLLM response or stream wrapper"""
+    usage_data = {
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cached_tokens": 0,
+        "cache_creation_tokens": 0,
+        "total_tokens": 0,
+        "is_cache_hit": getattr(source, "_cache_hit", False),
+    }
+
+    usage = getattr(source, "usage", None)
+    if usage:
+        usage_data["input_tokens"] = usage.prompt_tokens or 0
+        usage_data["output_tokens"] = usage.completion_tokens or 0
+        usage_data["total_tokens"] = usage.total_tokens or 0
+
+        # prompt_tokens_details is None when the provider reports no cache usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None:
+            usage_data["cached_tokens"] = details.cached_tokens or 0
             usage_data["cache_creation_tokens"] = (
-                prompt_tokens_details.cache_creation_tokens
+                getattr(details, "cache_creation_tokens", 0) or 0
             )
 
-        if hasattr(stream_wrapper, "_cache_hit"):
-            usage_data["is_cache_hit"] = stream_wrapper._cache_hit
-
-        return usage_data
+    return usage_data
+
+
+def _extract_usage_from_mapping(source: Mapping[str, Any]) -> Dict[str, Any]:
+    """Build the billing usage dict from an OpenAI-format response dict"""
+    usage = source.get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "input_tokens": usage.get("prompt_tokens") or 0,
+        "output_tokens": usage.get("completion_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or 0,
+        "cache_creation_tokens": details.get("cache_creation_tokens") or 0,
+        "total_tokens": usage.get("total_tokens") or 0,
+        "is_cache_hit": False,
+    }
+
+
+@functools.cache
+def _usage_extractor_for(response_type: type) -> Callable[[Any], Dict[str, Any]]:
+    """Pick the usage extractor for a response class, once per class"""
+    if issubclass(response_type, Mapping):
+        return _extract_usage_from_mapping
+    return _extract_usage
@@ -6,29 +6,115 @@ import logging
 import time
 from typing import Any, Dict, Tuple
 
+import httpx
+import orjson
 from fastapi import Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from litellm.exceptions import AuthenticationError, RateLimitError
 
 from gateway.auth.dependencies import require_model_access
 from gateway.billing import BillingManager
 from gateway.models import Account, ApiKey
-from gateway.providers.anthropic import AnthropicProvider
+from gateway.models.usage_log import UsageData
+from gateway.providers.anthropic import AnthropicAPIError, AnthropicProvider
+from gateway.utils.responses import ORJSONResponse
 
 from .litellm_client import LiteLLMClient
 from .streaming import StreamingResponseHandler
 
 logger = logging.getLogger(__name__)
 
+# Streamed responses are already-framed SSE bytes; X-Accel-Buffering stops
+# nginx-style proxies from holding them back
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+# Model names served by the Anthropic provider for token counting
+_ANTHROPIC_MODEL_PREFIXES = ("claude", "anthropic")
+
+# Client-facing error bodies, encoded once; any status not listed is a 500
+_UPSTREAM_ERRORS: Dict[int, bytes] = {
+    429: orjson.dumps(
+        {
+            "error": {
+                "message": "Rate limit exceeded",
+                "type": "rate_limit_exceeded",
+            }
+        }
+    ),
+    401: orjson.dumps(
+        {
+            "error": {
+                "message": "Invalid API key provided to upstream service",
+                "type": "invalid_request_error",
+            }
+        }
+    ),
+}
+_INTERNAL_ERROR = orjson.dumps(
+    {
+        "error": {
+            "message": "Internal server error",
+            "type": "internal_error",
+        }
+    }
+)
+
+
+def _to_dict(response: Any) -> Dict[str, Any]:
+    """Convert a LiteLLM response object to a dictionary for JSON serialization"""
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    if hasattr(response, "dict"):
+        return response.dict()
+    return dict(response)
+
+
+def _anthropic_usage_to_dict(usage_data: UsageData) -> Dict[str, Any]:
+    """Convert Anthropic usage data to the billing usage dict"""
+    return {
+        "input_tokens": usage_data.input_tokens,
+        "output_tokens": usage_data.output_tokens,
+        "cached_tokens": usage_data.cached_tokens,
+        "cache_creation_tokens": usage_data.cache_creation_tokens,
+        "total_tokens": usage_data.total_tokens,
+        "is_cache_hit": False,
+    }
+
+
+def _upstream_error_status(e: Exception) -> int:
+    """Map a routing exception to the status reported to the client"""
+    if isinstance(e, AnthropicAPIError):
+        return e.status
+    if isinstance(e, RateLimitError):
+        return 429
+    if isinstance(e, AuthenticationError):
+        return 401
+    return 500
+
 
 class ProxyRouter:
     """Main proxy router for LLM API requests"""
 
     def __init__(self):
-        self.litellm_client = LiteLLMClient()
+        # One pooled HTTP client for all LiteLLM upstream calls
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=1024, max_keepalive_connections=256),
+            timeout=httpx.Timeout(600.0, connect=10.0),
+        )
+        self.litellm_client = LiteLLMClient(http_client=self._http_client)
         self.anthropic_provider = AnthropicProvider()
         self.billing_manager = BillingManager()
         self.streaming_handler = StreamingResponseHandler(self.billing_manager)
 
+    async def aclose(self):
+        """Close upstream HTTP connections"""
+        await self.anthropic_provider.close()
+        await self._http_client.aclose()
+
     async def route_request(
         self,
         request: Request,
@@ -36,41 +122,44 @@ class ProxyRouter:
         account: Account,
         request_data: Dict[str, Any],
         endpoint: str,
-    ) -> Tuple[JSONResponse, StreamingResponse]:
+    ) -> Tuple[ORJSONResponse, StreamingResponse]:
         """
         Route request to appropriate provider and handle response
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         client_ip = request.client.host if request.client else None
 
         try:
-            # Determine provider based on endpoint
-            provider = self.litellm_client.get_provider_from_endpoint(endpoint)
-            logger.info(f"Routing request to {provider} for endpoint {endpoint}")
-
             # Extract model name from request
             model_name = request_data.get("model")
             if not model_name:
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=400, content={"error": "Model name is required"}
                 )
 
             # Check model access permissions
             require_model_access(api_key, model_name)
 
+            # Determine provider based on endpoint
+            provider = self.litellm_client.get_provider_from_endpoint(endpoint)
+            logger.info("Routing request to %s for endpoint %s", provider, endpoint)
+
             # Check if this is a streaming request
             is_streaming = request_data.get("stream", False)
 
             # Route to appropriate provider
             if provider == "anthropic":
                 # Use direct Anthropic provider
-                response = await self.anthropic_provider.forward_messages(
-                    request_data=request_data, stream=is_streaming
-                )
-
                 if is_streaming:
-                    # For Anthropic streaming, response is a tuple
-                    stream_generator, usage_data, complete_message = response
+                    # For Anthropic streaming, response is a tuple; the rebuilt
+                    # message is stored as the audit log response payload
+                    stream_generator, usage_data, complete_message = (
+                        await self.anthropic_provider.forward_messages(
+                            request_data=request_data,
+                            stream=True,
+                            track_content=self.billing_manager.enabled,
+                        )
+                    )
                     return await self._handle_anthropic_streaming_response(
                         stream_generator=stream_generator,
                         usage_data=usage_data,
@@ -80,20 +169,34 @@ class ProxyRouter:
                         request_data=request_data,
                         endpoint=endpoint,
                         client_ip=client_ip,
-                        processing_time_ms=(time.time() - start_time) * 1000,
+                        processing_time_ms=(time.perf_counter() - start_time) * 1000,
                     )
                 else:
-                    # For Anthropic non-streaming, response is a dict
+                    # For Anthropic non-streaming, forward the upstream body as-is
+                    # and decode it once for billing
+                    body, status_code, content_type = (
+                        await self.anthropic_provider.forward_messages_passthrough(
+                            request_data=request_data
+                        )
+                    )
+                    if not self.billing_manager.enabled:
+                        return Response(
+                            content=body, status_code=status_code, media_type=content_type
+                        )
+                    response = orjson.loads(body)
                     usage_data = self.anthropic_provider.extract_usage_from_response(response)
                     return await self._handle_anthropic_non_streaming_response(
                         response=response,
+                        raw_body=body,
+                        status_code=status_code,
+                        media_type=content_type,
                         usage_data=usage_data,
                         api_key=api_key,
                         account=account,
                         request_data=request_data,
                         endpoint=endpoint,
                         client_ip=client_ip,
-                        processing_time_ms=(time.time() - start_time) * 1000,
+                        processing_time_ms=(time.perf_counter() - start_time) * 1000,
                     )
             else:
                 # Use LiteLLM for other providers
@@ -114,7 +217,7 @@ class ProxyRouter:
                 else:
                     # Handle non-streaming response
                     logger.debug(
-                        f"#response_debug router: non-streaming response: {response}"
+                        "#response_debug router: non-streaming response: %s", response
                     )
                     return await self._handle_non_streaming_response(
                         response=response,
@@ -123,57 +226,35 @@ class ProxyRouter:
                         request_data=request_data,
                         endpoint=endpoint,
                         client_ip=client_ip,
-                        processing_time_ms=(time.time() - start_time) * 1000,
+                        processing_time_ms=(time.perf_counter() - start_time) * 1000,
                     )
 
         except Exception as e:
             logger.error(f"Error in proxy routing: {e}")
 
             # Log the failed request for audit purposes
-            try:
-                await self.billing_manager.log_failed_request(
-                    api_key=api_key,
-                    account=account,
-                    request_data=request_data,
-                    endpoint=endpoint,
-                    error_message=str(e),
-                    client_ip=client_ip,
-                    processing_time_ms=(time.time() - start_time) * 1000,
-                )
-            except Exception as log_error:
-                logger.error(f"Failed to log error request: {log_error}")
+            if self.billing_manager.enabled:
+                try:
+                    await self.billing_manager.log_failed_request(
+                        api_key=api_key,
+                        account=account,
+                        request_data=request_data,
+                        endpoint=endpoint,
+                        error_message=str(e),
+                        client_ip=client_ip,
+                        processing_time_ms=(time.perf_counter() - start_time) * 1000,
+                    )
+                except Exception as log_error:
+                    logger.error(f"Failed to log error request: {log_error}")
 
             # Return error response based on exception type
-            if "rate_limit" in str(e).lower():
-                return JSONResponse(
-                    status_code=429,
-                    content={
-                        "error": {
-                            "message": "Rate limit exceeded",
-                            "type": "rate_limit_exceeded",
-                        }
-                    },
-                )
-            elif "invalid" in str(e).lower() and "key" in str(e).lower():
-                return JSONResponse(
-                    status_code=401,
-                    content={
-                        "error": {
-                            "message": "Invalid API key provided to upstream service",
-                            "type": "invalid_request_error",
-                        }
-                    },
-                )
-            else:
-                return JSONResponse(
-                    status_code=500,
-                    content={
-                        "error": {
-                            "message": "Internal server error",
-                            "type": "internal_error",
-                        }
-                    },
-                )
+            status_code = _upstream_error_status(e)
+            content = _UPSTREAM_ERRORS.get(status_code)
+            if content is None:
+                status_code, content = 500, _INTERNAL_ERROR
+            return Response(
+                content=content, status_code=status_code, media_type="application/json"
+            )
 
     async def _handle_non_streaming_response(
         self,
@@ -184,26 +265,25 @@ class ProxyRouter:
         endpoint: str,
         client_ip: str = None,
         processing_time_ms: float = 0,
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Handle non-streaming response with billing"""
 
+        # Convert response to dictionary for JSON serialization
+        response_dict = _to_dict(response)
+
+        if not self.billing_manager.enabled:
+            return ORJSONResponse(content=response_dict)
+
+        model_name = request_data.get("model", "unknown")
         try:
             # Extract usage information
             usage_data = self.litellm_client.extract_usage_from_response(response)
 
-            # Convert response to dictionary for JSON serialization
-            if hasattr(response, "model_dump"):
-                response_dict = response.model_dump()
-            elif hasattr(response, "dict"):
-                response_dict = response.dict()
-            else:
-                response_dict = dict(response)
-
             # Process billing
-            await self.billing_manager.process_usage_and_bill(
+            self.billing_manager.enqueue_usage(
                 api_key=api_key,
                 account=account,
-                model_name=request_data.get("model", "unknown"),
+                model_name=model_name,
                 usage_data=usage_data,
                 request_endpoint=endpoint,
                 request_payload=request_data,
@@ -212,58 +292,44 @@ class ProxyRouter:
                 processing_time_ms=processing_time_ms,
             )
 
-            logger.info(
-                f"Request processed for user {account.user_id}: "
-                f"model {request_data.get('model')}, "
-                f"{usage_data['total_tokens']} tokens"
-            )
-
-            return JSONResponse(content=response_dict)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Request processed for user %s: model %s, %s tokens",
+                    account.user_id, model_name, usage_data["total_tokens"],
+                )
 
         except Exception as e:
-            logger.error(f"Error handling non-streaming response: {e}")
             # Still return the response even if billing failed
-            if hasattr(response, "model_dump"):
-                response_dict = response.model_dump()
-            elif hasattr(response, "dict"):
-                response_dict = response.dict()
-            else:
-                response_dict = dict(response)
+            logger.error(f"Error handling non-streaming response: {e}")
 
-            return JSONResponse(content=response_dict)
+        return ORJSONResponse(content=response_dict)
 
     async def _handle_anthropic_non_streaming_response(
         self,
         response: Dict[str, Any],
-        usage_data: Any,
+        raw_body: bytes,
+        usage_data: UsageData,
         api_key: ApiKey,
         account: Account,
         request_data: Dict[str, Any],
         endpoint: str,
         client_ip: str = None,
         processing_time_ms: float = 0,
-    ) -> JSONResponse:
+        status_code: int = 200,
+        media_type: str = "application/json",
+    ) -> Response:
         """Handle Anthropic non-streaming response with billing"""
 
+        model_name = request_data.get("model", "unknown")
         try:
             # Convert usage_data to dict for billing
-            if hasattr(usage_data, '__dict__'):
-                usage_dict = usage_data.__dict__
-            else:
-                usage_dict = {
-                    "input_tokens": getattr(usage_data, 'input_tokens', 0),
-                    "output_tokens": getattr(usage_data, 'output_tokens', 0),
-                    "cached_tokens": getattr(usage_data, 'cached_tokens', 0),
-                    "cache_creation_tokens": getattr(usage_data, 'cache_creation_tokens', 0),
-                    "total_tokens": getattr(usage_data, 'total_tokens', 0),
-                    "is_cache_hit": False,
-                }
+            usage_dict = _anthropic_usage_to_dict(usage_data)
 
             # Process billing
-            await self.billing_manager.process_usage_and_bill(
+            self.billing_manager.enqueue_usage(
                 api_key=api_key,
                 account=account,
-                model_name=request_data.get("model", "unknown"),
+                model_name=model_name,
                 usage_data=usage_dict,
                 request_endpoint=endpoint,
                 request_payload=request_data,
@@ -272,22 +338,23 @@ class ProxyRouter:
                 processing_time_ms=processing_time_ms,
             )
 
-            logger.info(
-                f"Anthropic request processed for user {account.user_id}: "
-                f"model {request_data.get('model')}, "
-                f"{usage_dict['total_tokens']} tokens"
-            )
-
-            return JSONResponse(content=response)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Anthropic request processed for user %s: model %s, %s tokens",
+                    account.user_id, model_name, usage_dict["total_tokens"],
+                )
 
         except Exception as e:
             logger.error(f"Error handling Anthropic non-streaming response: {e}")
-            return JSONResponse(content=response)
+
+        return Response(
+            content=raw_body, status_code=status_code, media_type=media_type
+        )
 
     async def _handle_anthropic_streaming_response(
         self,
         stream_generator,
-        usage_data: Any,
+        usage_data: UsageData,
         complete_message: Dict[str, Any],
         api_key: ApiKey,
         account: Account,
@@ -298,6 +365,15 @@ class ProxyRouter:
     ) -> StreamingResponse:
         """Handle Anthropic streaming response with billing"""
 
+        if not self.billing_manager.enabled:
+            return StreamingResponse(
+                stream_generator,
+                media_type="text/event-stream",
+                headers=_SSE_HEADERS,
+            )
+
+        model_name = request_data.get("model", "unknown")
+
         async def billing_wrapper():
             # Stream all events
             async for chunk in stream_generator:
@@ -306,22 +382,12 @@ class ProxyRouter:
             # After streaming completes, process billing
             try:
                 # Convert usage_data to dict for billing
-                if hasattr(usage_data, '__dict__'):
-                    usage_dict = usage_data.__dict__
-                else:
-                    usage_dict = {
-                        "input_tokens": getattr(usage_data, 'input_tokens', 0),
-                        "output_tokens": getattr(usage_data, 'output_tokens', 0),
-                        "cached_tokens": getattr(usage_data, 'cached_tokens', 0),
-                        "cache_creation_tokens": getattr(usage_data, 'cache_creation_tokens', 0),
-                        "total_tokens": getattr(usage_data, 'total_tokens', 0),
-                        "is_cache_hit": False,
-                    }
+                usage_dict = _anthropic_usage_to_dict(usage_data)
 
-                await self.billing_manager.process_usage_and_bill(
+                self.billing_manager.enqueue_usage(
                     api_key=api_key,
                     account=account,
-                    model_name=request_data.get("model", "unknown"),
+                    model_name=model_name,
                     usage_data=usage_dict,
                     request_endpoint=endpoint,
                     request_payload=request_data,
@@ -330,19 +396,20 @@ class ProxyRouter:
                     processing_time_ms=processing_time_ms,
                 )
 
-                logger.info(
-                    f"Anthropic streaming request processed for user {account.user_id}: "
-                    f"model {request_data.get('model')}, "
-                    f"{usage_dict['total_tokens']} tokens"
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "Anthropic streaming request processed for user %s: "
+                        "model %s, %s tokens",
+                        account.user_id, model_name, usage_dict["total_tokens"],
+                    )
 
             except Exception as e:
                 logger.error(f"Error in Anthropic streaming billing: {e}")
 
         return StreamingResponse(
             billing_wrapper(),
-            media_type="text/plain",
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+            media_type="text/event-stream",
+            headers=_SSE_HEADERS,
         )
 
     async def count_tokens(
@@ -350,7 +417,7 @@ class ProxyRouter:
         request_data: Dict[str, Any],
         api_key: ApiKey,
         account: Account,
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """
         Count tokens for a request without creating a message
         """
@@ -358,19 +425,19 @@ class ProxyRouter:
             # Extract model name from request
             model_name = request_data.get("model")
             if not model_name:
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=400, content={"error": "Model name is required"}
                 )
 
             # Determine if this is an Anthropic model
-            if any(provider in model_name.lower() for provider in ["claude", "anthropic"]):
+            if model_name.lower().startswith(_ANTHROPIC_MODEL_PREFIXES):
                 # Use Anthropic provider for token counting
                 response = await self.anthropic_provider.count_tokens(request_data)
-                return JSONResponse(content=response)
+                return ORJSONResponse(content=response)
             else:
                 # For non-Anthropic models, return an error for now
                 # In the future, could add support for other providers
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=400,
                     content={
                         "error": "Token counting only supported for Anthropic models currently"
@@ -379,12 +446,6 @@ class ProxyRouter:
 
         except Exception as e:
             logger.error(f"Error in token counting: {e}")
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "error": {
-                        "message": "Internal server error",
-                        "type": "internal_error",
-                    }
-                },
+            return Response(
+                content=_INTERNAL_ERROR, status_code=500, media_type="application/json"
             )
@@ -2,17 +2,248 @@
 Streaming response handling with proper billing
 """
 
-import json
 import logging
-from typing import Any, AsyncGenerator, Dict, Optional
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
 
+import orjson
 from fastapi.responses import StreamingResponse
 
 from gateway.billing import BillingManager
 from gateway.models import Account, ApiKey
+from gateway.utils.streams import coalesce_stream
 
 logger = logging.getLogger(__name__)
 
+# Chunks that are already waiting are coalesced into one downstream write of
+# at most this many SSE frames
+_STREAM_BATCH_CHUNKS = 8
+
+_SSE_DATA_PREFIX = b"data: "
+_SSE_FRAME_END = b"\n\n"
+_SSE_DONE = b"data: [DONE]\n\n"
+_SSE_STREAM_ERROR = (
+    _SSE_DATA_PREFIX
+    + orjson.dumps(
+        {
+            "error": {
+                "message": "Streaming error occurred",
+                "type": "stream_error",
+            }
+        }
+    )
+    + _SSE_FRAME_END
+)
+
+# Delta fields copied by _delta_to_dict, in frame order
+_DELTA_DIRECT_FIELDS = (
+    "role",
+    "content",
+    "tool_calls",
+    "function_call",
+    "reasoning_content",
+)
+# Optional delta fields that _delta_to_dict does not copy; a chunk carrying any
+# of them is written from its full model_dump instead
+_DELTA_PASSTHROUGH_FIELDS = (
+    "thinking_blocks",
+    "reasoning_items",
+    "provider_specific_fields",
+    "audio",
+    "images",
+    "annotations",
+)
+
+
+def _write_chunk(chunk: Any, out: bytearray) -> None:
+    """Append one upstream stream chunk to out as an SSE data frame"""
+    if isinstance(chunk, bytes):
+        out += chunk
+        return
+    if isinstance(chunk, str):
+        out += chunk.encode()
+        return
+    if hasattr(chunk, "model_dump"):
+        chunk = chunk.model_dump()
+    out += _SSE_DATA_PREFIX
+    out += orjson.dumps(chunk)
+    out += _SSE_FRAME_END
+
+
+def _to_jsonable(obj: Any) -> Any:
+    """orjson fallback for nested pydantic objects such as tool calls and usage"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _model_fields(obj: Any) -> Dict[str, Any]:
+    """
+    The set fields of a LiteLLM stream object, declared and extra, in one dict
+
+    LiteLLM keeps most stream fields as pydantic extras and deletes unset
+    declared ones, so attribute reads go through pydantic's __getattr__ at
+    around a microsecond each; the writers read these dicts instead
+    """
+    extra = getattr(obj, "__pydantic_extra__", None)
+    return {**vars(obj), **extra} if extra else vars(obj)
+
+
+def _delta_to_dict(delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the populated fields of a streaming delta"""
+    data = {}
+    for name in _DELTA_DIRECT_FIELDS:
+        value = delta.get(name)
+        if value is not None:
+            data[name] = value
+    return data
+
+
+def _openai_choices(
+    fields: Dict[str, Any],
+) -> Optional[List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    The (choice, delta) fields of each choice in a chunk, or None when the
+    chunk carries a field the direct OpenAI writers do not emit
+    """
+    if fields.get("provider_specific_fields"):
+        return None
+    choices = []
+    for choice in fields["choices"]:
+        choice_fields = _model_fields(choice)
+        if choice_fields.get("logprobs") is not None:
+            return None
+        delta = choice_fields.get("delta")
+        if delta is None:
+            return None
+        delta_fields = _model_fields(delta)
+        for name in _DELTA_PASSTHROUGH_FIELDS:
+            if delta_fields.get(name):
+                return None
+        choices.append((choice_fields, delta_fields))
+    return choices
+
+
+def _chunk_header(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """The top-level fields of an OpenAI stream chunk, in frame order"""
+    header = {
+        "id": fields.get("id"),
+        "object": fields.get("object"),
+        "created": fields.get("created"),
+        "model": fields.get("model"),
+    }
+    # Set on every chunk of a stream by current OpenAI models
+    system_fingerprint = fields.get("system_fingerprint")
+    if system_fingerprint is not None:
+        header["system_fingerprint"] = system_fingerprint
+    return header
+
+
+def _write_openai_chunk(chunk: Any, out: bytearray) -> None:
+    """Append an OpenAI-shaped stream chunk to out, reading its fields directly"""
+    fields = _model_fields(chunk)
+    choices = _openai_choices(fields)
+    if choices is None:
+        _write_chunk(chunk, out)
+        return
+    _write_openai_fields(fields, choices, out)
+
+
+def _write_openai_fields(
+    fields: Dict[str, Any],
+    choices: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    out: bytearray,
+) -> None:
+    """Write a chunk from fields already checked by _openai_choices"""
+    data = _chunk_header(fields)
+    data["choices"] = [
+        {
+            "index": choice.get("index"),
+            "delta": _delta_to_dict(delta),
+            "finish_reason": choice.get("finish_reason"),
+        }
+        for choice, delta in choices
+    ]
+    usage = fields.get("usage")
+    if usage is not None:
+        data["usage"] = usage
+    out += _SSE_DATA_PREFIX
+    out += orjson.dumps(data, default=_to_jsonable)
+    out += _SSE_FRAME_END
+
+
+def _make_openai_writer() -> Callable[[Any, bytearray], None]:
+    """
+    Build a per-stream OpenAI chunk writer
+
+    Mid-stream chunks that carry only delta content are written from a cached
+    frame prefix; every other chunk is written as _write_openai_chunk would,
+    producing the same bytes. Each chunk's fields are read and checked once
+    """
+    prefix_key = None
+    prefix = b""
+
+    def write(chunk: Any, out: bytearray) -> None:
+        nonlocal prefix_key, prefix
+
+        fields = _model_fields(chunk)
+        choices = _openai_choices(fields)
+        if choices is None:
+            _write_chunk(chunk, out)
+            return
+        if len(choices) != 1 or fields.get("usage") is not None:
+            _write_openai_fields(fields, choices, out)
+            return
+        choice, delta = choices[0]
+        content = delta.get("content")
+        if (
+            content is None
+            or choice.get("finish_reason") is not None
+            or delta.get("role") is not None
+            or delta.get("tool_calls") is not None
+            or delta.get("function_call") is not None
+            or delta.get("reasoning_content") is not None
+        ):
+            _write_openai_fields(fields, choices, out)
+            return
+
+        # The header fields are constant within a stream, so the frame prefix
+        # is rebuilt only when one of them changes
+        key = (
+            fields.get("id"),
+            fields.get("object"),
+            fields.get("created"),
+            fields.get("model"),
+            fields.get("system_fingerprint"),
+        )
+        if key != prefix_key:
+            prefix_key = key
+            prefix = (
+                _SSE_DATA_PREFIX
+                + orjson.dumps(_chunk_header(fields))[:-1]
+                + b',"choices":[{"index":'
+            )
+        out += prefix
+        out += orjson.dumps(choice.get("index"))
+        out += b',"delta":{"content":'
+        out += orjson.dumps(content)
+        out += b'},"finish_reason":null}]}'
+        out += _SSE_FRAME_END
+
+    return write
+
+
+def _make_serializer(first_chunk: Any) -> Callable[[Any, bytearray], None]:
+    """Pick the chunk writer for a stream from the shape of its first chunk"""
+    choices = getattr(first_chunk, "choices", None)
+    if (
+        hasattr(first_chunk, "model_dump")
+        and choices
+        and hasattr(choices[0], "delta")
+    ):
+        return _make_openai_writer()
+    return _write_chunk
+
 
 class StreamingResponseHandler:
     """Handle streaming responses with proper billing"""
@@ -35,31 +266,38 @@ class StreamingResponseHandler:
 
         async def stream_with_billing():
             """Generator that yields stream chunks and handles billing at the end"""
-            # collected_chunks = []
+            # output_chars = 0
+            # chunk_count = 0
             # stream_wrapper = None
 
+            serialize = None
+
+            def write(item: Any, out: bytearray) -> None:
+                nonlocal serialize
+                logger.debug("#response_debug streaming: %s", item)
+                if serialize is None:
+                    # Chunks within one stream share a shape, so the writer
+                    # is chosen once
+                    serialize = _make_serializer(item)
+                serialize(item, out)
+
             try:
-                # Stream the response chunks
-                async for chunk in stream_generator:
-                    if chunk:
-                        chunk_str = str(chunk)
-                        # collected_chunks.append(chunk_str)
-                        logger.debug(f"#response_debug streaming: {chunk_str}")
-                        yield chunk_str
-
-                # Signal end of stream
+                # Stream the response chunks, ending with [DONE]; closing the
+                # batches right away stops the upstream reader on disconnect
+                batches = coalesce_stream(
+                    stream_generator,
+                    write,
+                    max_items=_STREAM_BATCH_CHUNKS,
+                    trailer=_SSE_DONE,
+                )
+                async with aclosing(batches):
+                    async for chunk in batches:
+                        yield chunk
                 logger.debug("#response_debug streaming: [DONE]")
-                yield "data: [DONE]\n\n"
 
             except Exception as e:
                 logger.error(f"Error during streaming: {e}")
-                error_chunk = {
-                    "error": {
-                        "message": "Streaming error occurred",
-                        "type": "stream_error",
-                    }
-                }
-                yield f"data: {json.dumps(error_chunk)}\n\n"
+                yield _SSE_STREAM_ERROR
                 raise
 
             # finally:
@@ -71,7 +309,8 @@ class StreamingResponseHandler:
             #         account,
             #         request_data,
             #         endpoint,
-            #         collected_chunks,
+            #         output_chars,
+            #         chunk_count,
             #         client_ip,
             #     )
             # except Exception as e:
@@ -79,11 +318,11 @@ class StreamingResponseHandler:
 
         return StreamingResponse(
             stream_with_billing(),
-            media_type="text/plain",
+            media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
-                "Content-Type": "text/plain; charset=utf-8",
+                "X-Accel-Buffering": "no",
             },
         )
 
@@ -94,10 +333,16 @@ class StreamingResponseHandler:
         account: Account,
         request_data: Dict[str, Any],
         endpoint: str,
-        collected_chunks: list,
+        output_chars: int,
+        chunk_count: int,
         client_ip: Optional[str] = None,
     ):
-        """Handle billing after stream completion"""
+        """
+        Handle billing after stream completion
+
+        output_chars is the running length of streamed delta content, used only
+        when the stream carries no usage
+        """
 
         # Extract usage information from completed stream
         usage_data = {
@@ -136,22 +381,21 @@ class StreamingResponseHandler:
             logger.warning("No usage data available from stream, attempting estimation")
             # This is a fallback - in production you might want to implement
             # more sophisticated token counting
-            content = "".join(collected_chunks)
-            estimated_tokens = len(content.split()) * 1.3  # Rough estimation
-            usage_data["output_tokens"] = int(estimated_tokens)
+            estimated_tokens = output_chars // 4  # ~4 characters per token
+            usage_data["output_tokens"] = estimated_tokens
             usage_data["total_tokens"] = (
                 usage_data["input_tokens"] + usage_data["output_tokens"]
             )
 
         # Process billing
-        await self.billing_manager.process_usage_and_bill(
+        self.billing_manager.enqueue_usage(
             api_key=api_key,
             account=account,
             model_name=request_data.get("model", "unknown"),
             usage_data=usage_data,
             request_endpoint=endpoint,
             request_payload=request_data,
-            response_payload={"streaming": True, "chunks": len(collected_chunks)},
+            response_payload={"streaming": True, "chunks": chunk_count},
             client_ip=client_ip,
         )
 
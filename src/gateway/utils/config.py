@@ -2,9 +2,16 @@
 Configuration management using Pydantic settings
 """
 import os
+from functools import lru_cache
 from typing import Optional, List
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# Upstream providers: (provider name, API key setting, API key env var)
+_PROVIDER_KEYS = (
+    ("openai", "openai_api_key", "OPENAI_API_KEY"),
+    ("anthropic", "anthropic_api_key", "ANTHROPIC_API_KEY"),
+)
 
 
 class Settings(BaseSettings):
@@ -18,9 +25,12 @@ class Settings(BaseSettings):
     # Database settings
     mongo_uri: str = Field(..., description="MongoDB connection URI")
     mongo_db_name: str = Field("llm_gateway", description="MongoDB database name")
+    mongo_max_pool_size: int = Field(100, description="MongoDB max connections per server")
+    mongo_min_pool_size: int = Field(10, description="MongoDB connections kept open per server")
 
     # Redis settings
     redis_url: str = Field("redis://localhost:6379", description="Redis connection URL")
+    redis_max_connections: int = Field(50, description="Redis connection pool size")
 
     # Admin settings
     admin_api_key: str = Field(..., description="Admin API key for management endpoints")
@@ -36,30 +46,31 @@ class Settings(BaseSettings):
     cache_size: int = Field(10000, description="L1 cache max size")
     cache_ttl: int = Field(300, description="L1 cache TTL in seconds")
 
+    # Billing settings
+    billing_enabled: bool = Field(True, description="Bill and audit-log proxied requests")
+
     # Request settings
     max_request_size: int = Field(10 * 1024 * 1024, description="Max request size in bytes")
     request_timeout: int = Field(60, description="Request timeout in seconds")
 
-    model_config = {
-        "env_file": ".env",
-        "env_file_encoding": "utf-8",
-        "case_sensitive": False,
-        "env_prefix": "",
-        "validate_default": True,
-        "extra": "ignore"
-    }
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        env_prefix="",
+        validate_default=True,
+        extra="ignore",
+    )
 
     def validate_provider_keys(self, strict: bool = True) -> List[str]:
         """Validate that at least one provider key is configured"""
-        missing_keys = []
-
-        if not self.openai_api_key:
-            missing_keys.append("OPENAI_API_KEY")
+        missing_keys = [
+            env_var
+            for _, key_attr, env_var in _PROVIDER_KEYS
+            if not getattr(self, key_attr)
+        ]
 
-        if not self.anthropic_api_key:
-            missing_keys.append("ANTHROPIC_API_KEY")
-
-        if len(missing_keys) == 2 and strict:
+        if strict and len(missing_keys) == len(_PROVIDER_KEYS):
             raise ValueError(
                 "At least one provider API key must be configured. "
                 "Set OPENAI_API_KEY or ANTHROPIC_API_KEY environment variable."
@@ -69,12 +80,11 @@ class Settings(BaseSettings):
 
     def get_available_providers(self) -> List[str]:
         """Get list of available providers based on configured API keys"""
-        providers = []
-        if self.openai_api_key:
-            providers.append("openai")
-        if self.anthropic_api_key:
-            providers.append("anthropic")
-        return providers
+        return [
+            provider
+            for provider, key_attr, _ in _PROVIDER_KEYS
+            if getattr(self, key_attr)
+        ]
 
     def log_configuration(self):
         """Log current configuration for debugging (without sensitive data)"""
@@ -94,5 +104,11 @@ class Settings(BaseSettings):
         logger.info(f"  Admin API Key: {'✓ Set' if self.admin_api_key else '✗ Not Set'}")
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsed from the environment once"""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
@@ -0,0 +1,86 @@
+"""
+Coalescing of upstream stream items into downstream writes
+"""
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Optional
+
+# The queue bound caps how far upstream reads run ahead of the client
+STREAM_QUEUE_SIZE = 64
+
+
+async def _pump(source: AsyncIterator[Any], queue: asyncio.Queue) -> None:
+    """Read source items into queue, followed by None or the raised error"""
+    try:
+        async for item in source:
+            if item:
+                await queue.put(item)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await queue.put(e)
+        return
+
+    await queue.put(None)
+
+
+async def coalesce_stream(
+    source: AsyncIterator[Any],
+    write: Callable[[Any, bytearray], Optional[bool]],
+    max_items: int = 0,
+    max_bytes: int = 0,
+    trailer: bytes = b"",
+) -> AsyncGenerator[bytes, None]:
+    """
+    Yield the frames written for source items, batching items that are already waiting
+
+    Source items are read by a separate task so that items which arrive while
+    the client is still consuming the previous write are sent together; the
+    first item is never held back. write(item, buffer) appends an item's frame
+    and may return False to end the stream after it. A batch closes after
+    max_items items or max_bytes bytes (0 means no limit). trailer is appended
+    to the last write when the source is exhausted. An error raised by the
+    source is re-raised after the frames already written are yielded.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    reader = asyncio.create_task(_pump(source, queue))
+    # Frames are written straight into one buffer owned by this stream;
+    # each write is copied out as bytes since the buffer is then reused
+    buffer = bytearray()
+    error: Optional[Exception] = None
+
+    try:
+        finished = False
+        while not finished:
+            item = await queue.get()
+            batched = 0
+            while True:
+                if item is None:
+                    buffer += trailer
+                    finished = True
+                    break
+                if isinstance(item, Exception):
+                    error = item
+                    finished = True
+                    break
+
+                if write(item, buffer) is False:
+                    finished = True
+                    break
+                batched += 1
+                if (
+                    queue.empty()
+                    or (max_items and batched >= max_items)
+                    or (max_bytes and len(buffer) >= max_bytes)
+                ):
+                    break
+                item = queue.get_nowait()
+
+            if buffer:
+                chunk = bytes(buffer)
+                buffer.clear()
+                yield chunk
+
+        if error is not None:
+            raise error
+    finally:
+        reader.cancel()
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup
+"""
+import os
+
+# Settings are built at import time and require these
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("ADMIN_API_KEY", "test-admin-key")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
@@ -0,0 +1,101 @@
+"""
+Tests for the background billing flusher
+"""
+import asyncio
+
+import pytest
+
+from gateway.billing import billing_manager as billing_module
+from gateway.billing import BillingManager
+from gateway.models import Account, ApiKey
+
+API_KEY = ApiKey(api_key="sk-test", user_id="user-1", key_name="test")
+ACCOUNT = Account(user_id="user-1", budget_usd=10.0)
+
+
+@pytest.fixture
+def manager():
+    manager = BillingManager()
+    manager.batches = []
+
+    async def bill_batch(records):
+        if records:
+            manager.batches.append([record["model_name"] for record in records])
+
+    manager._bill_batch = bill_batch
+    return manager
+
+
+def _enqueue(manager: BillingManager, model_name: str) -> None:
+    manager.enqueue_usage(
+        api_key=API_KEY,
+        account=ACCOUNT,
+        model_name=model_name,
+        usage_data={"total_tokens": 1},
+        request_endpoint="/v1/chat/completions",
+        request_payload={},
+        response_payload={},
+    )
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_billed_without_waiting(manager, monkeypatch):
+    monkeypatch.setattr(billing_module, "_BILLING_BATCH_SIZE", 3)
+    monkeypatch.setattr(billing_module, "_BILLING_FLUSH_SECONDS", 60.0)
+    await manager.start()
+
+    for i in range(4):
+        _enqueue(manager, f"m{i}")
+    await asyncio.sleep(0.01)
+
+    assert manager.batches == [["m0", "m1", "m2"]]
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_billed_after_flush_interval(manager, monkeypatch):
+    monkeypatch.setattr(billing_module, "_BILLING_BATCH_SIZE", 100)
+    monkeypatch.setattr(billing_module, "_BILLING_FLUSH_SECONDS", 0.05)
+    await manager.start()
+
+    _enqueue(manager, "m0")
+    _enqueue(manager, "m1")
+    await asyncio.sleep(0.01)
+    assert manager.batches == []
+
+    await asyncio.sleep(0.1)
+    assert manager.batches == [["m0", "m1"]]
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_bills_everything_queued(manager, monkeypatch):
+    monkeypatch.setattr(billing_module, "_BILLING_BATCH_SIZE", 100)
+    monkeypatch.setattr(billing_module, "_BILLING_FLUSH_SECONDS", 60.0)
+    await manager.start()
+
+    for i in range(5):
+        _enqueue(manager, f"m{i}")
+    await manager.stop()
+
+    assert manager.batches == [[f"m{i}" for i in range(5)]]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_waits_in_bounded_overflow_then_drops(manager, monkeypatch):
+    monkeypatch.setattr(billing_module, "_BILLING_QUEUE_SIZE", 2)
+    monkeypatch.setattr(billing_module, "_BILLING_BATCH_SIZE", 100)
+    monkeypatch.setattr(billing_module, "_BILLING_FLUSH_SECONDS", 60.0)
+    monkeypatch.setattr(billing_module, "_BILLING_OVERFLOW_TASKS", 2)
+    await manager.start()
+
+    # Nothing runs between these calls, so the flusher cannot drain the queue
+    for i in range(6):
+        _enqueue(manager, f"m{i}")
+
+    assert len(manager._overflow_tasks) == 2
+    assert manager.dropped_records == 2
+
+    await manager.stop()
+    assert manager.batches == [["m0", "m1", "m2", "m3"]]
+    assert not manager._overflow_tasks
@@ -0,0 +1,130 @@
+"""
+Tests for batched model cost lookups in the cache manager
+"""
+import asyncio
+
+import pytest
+
+from gateway.cache.cache_manager import CacheManager
+from gateway.models import ModelCost
+
+
+def _cost(model_name: str) -> ModelCost:
+    return ModelCost(
+        model_name=model_name,
+        provider="openai",
+        input_cost_per_million_tokens_usd=1.0,
+        output_cost_per_million_tokens_usd=2.0,
+    )
+
+
+class FakeModelCostRepository:
+    """Records get_many_by_names calls and answers from a fixed table"""
+
+    def __init__(self, costs=None, error=None):
+        self.costs = costs or {}
+        self.error = error
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def get_many_by_names(self, model_names):
+        self.calls.append(list(model_names))
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {name: self.costs[name] for name in model_names if name in self.costs}
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def listen(self):
+        for message in self.messages:
+            yield message
+
+
+def _manager(repo: FakeModelCostRepository) -> CacheManager:
+    manager = CacheManager()
+    manager.modelcost_repo = repo
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_query():
+    repo = FakeModelCostRepository({"a": _cost("a"), "b": _cost("b")})
+    manager = _manager(repo)
+
+    results = await asyncio.gather(
+        manager.get_model_cost("a"),
+        manager.get_model_cost("b"),
+        manager.get_model_cost("a"),
+        manager.get_model_cost("missing"),
+    )
+
+    assert repo.calls == [["a", "b", "missing"]]
+    assert [cost and cost.model_name for cost in results] == ["a", "b", "a", None]
+    assert "missing" in manager._model_cost_misses
+
+    # Hits and misses are now answered without another query
+    assert (await manager.get_model_cost("a")).model_name == "a"
+    assert await manager.get_model_cost("missing") is None
+    assert len(repo.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_repository_error_reaches_every_waiter():
+    repo = FakeModelCostRepository(error=RuntimeError("db down"))
+    manager = _manager(repo)
+
+    results = await asyncio.gather(
+        manager.get_model_cost("a"),
+        manager.get_model_cost("a"),
+        manager.get_model_cost("b"),
+        return_exceptions=True,
+    )
+
+    assert repo.calls == [["a", "b"]]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not manager._model_cost_inflight
+    assert "a" not in manager._model_cost_misses
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    repo = FakeModelCostRepository({"a": _cost("a")})
+    repo.release.clear()
+    manager = _manager(repo)
+
+    cancelled = asyncio.create_task(manager.get_model_cost("a"))
+    waiting = asyncio.create_task(manager.get_model_cost("a"))
+    while not repo.calls:
+        await asyncio.sleep(0)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    repo.release.set()
+
+    assert (await waiting).model_name == "a"
+    assert repo.calls == [["a"]]
+
+
+@pytest.mark.asyncio
+async def test_model_cost_invalidation_clears_negative_entry():
+    repo = FakeModelCostRepository()
+    manager = _manager(repo)
+
+    assert await manager.get_model_cost("x") is None
+    assert "x" in manager._model_cost_misses
+
+    manager.pubsub = FakePubSub(
+        [{"type": "message", "data": b'{"type":"modelcost","key":"x"}'}]
+    )
+    await manager._handle_invalidations()
+
+    assert "x" not in manager._model_cost_misses
+    repo.costs["x"] = _cost("x")
+    assert (await manager.get_model_cost("x")).model_name == "x"
+    assert len(repo.calls) == 2
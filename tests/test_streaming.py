@@ -0,0 +1,85 @@
+"""
+Tests for SSE serialization of LiteLLM stream chunks
+"""
+import orjson
+from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices
+
+from gateway.proxy import streaming
+from gateway.proxy.streaming import _make_openai_writer, _write_openai_chunk
+
+LOGPROBS = {
+    "content": [
+        {"token": "hi", "logprob": -0.1, "bytes": [104, 105], "top_logprobs": []}
+    ]
+}
+
+
+def _chunk(system_fingerprint=None, **choice_kwargs) -> ModelResponseStream:
+    return ModelResponseStream(
+        id="chatcmpl-1",
+        created=1,
+        model="gpt-4o",
+        system_fingerprint=system_fingerprint,
+        choices=[StreamingChoices(delta=Delta(content="hi"), **choice_kwargs)],
+    )
+
+
+def _frame_data(frame: bytes) -> dict:
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    return orjson.loads(frame[len(b"data: "):-2])
+
+
+def test_openai_chunk_keeps_logprobs():
+    out = bytearray()
+    _write_openai_chunk(_chunk(index=0, logprobs=LOGPROBS), out)
+
+    choice = _frame_data(bytes(out))["choices"][0]
+    assert choice["logprobs"] == LOGPROBS
+    assert choice["delta"]["content"] == "hi"
+
+
+def test_openai_writer_keeps_logprobs_on_content_chunks():
+    write = _make_openai_writer()
+    out = bytearray()
+    write(_chunk(index=0), out)
+    write(_chunk(index=0, logprobs=LOGPROBS), out)
+
+    first, second = bytes(out).split(b"\n\n")[:2]
+    assert "logprobs" not in _frame_data(first + b"\n\n")["choices"][0]
+    assert _frame_data(second + b"\n\n")["choices"][0]["logprobs"] == LOGPROBS
+
+
+def test_openai_writer_matches_full_writer():
+    chunk = _chunk(index=0)
+    fast, full = bytearray(), bytearray()
+    _make_openai_writer()(chunk, fast)
+    _write_openai_chunk(chunk, full)
+
+    assert fast == full
+
+
+def test_openai_writer_encodes_missing_index_as_null():
+    chunk = _chunk(index=0)
+    chunk.choices[0].index = None
+    out = bytearray()
+    _make_openai_writer()(chunk, out)
+
+    assert _frame_data(bytes(out))["choices"][0]["index"] is None
+
+
+def test_system_fingerprint_chunks_stay_on_direct_paths(monkeypatch):
+    def full_dump(chunk, out):
+        raise AssertionError("chunk fell back to the full model_dump path")
+
+    monkeypatch.setattr(streaming, "_write_chunk", full_dump)
+    chunk = _chunk(system_fingerprint="fp_1", index=0)
+    fast, full = bytearray(), bytearray()
+    write = _make_openai_writer()
+    write(chunk, fast)
+    write(chunk, fast)
+    _write_openai_chunk(chunk, full)
+
+    assert fast == full + full
+    data = _frame_data(bytes(full))
+    assert data["system_fingerprint"] == "fp_1"
+    assert data["choices"][0]["delta"] == {"content": "hi"}
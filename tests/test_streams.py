@@ -0,0 +1,58 @@
+"""
+Tests for coalescing upstream stream items into downstream writes
+"""
+import pytest
+
+from gateway.utils.streams import coalesce_stream
+
+
+async def _source(items, error=None):
+    for item in items:
+        yield item
+    if error is not None:
+        raise error
+
+
+def _write(item: bytes, out: bytearray) -> None:
+    out += item
+
+
+async def _collect(batches) -> list:
+    return [chunk async for chunk in batches]
+
+
+@pytest.mark.asyncio
+async def test_waiting_items_are_batched_up_to_max_items():
+    # The source never suspends, so every item is queued before the first write
+    chunks = await _collect(
+        coalesce_stream(
+            _source([b"%d;" % i for i in range(5)]), _write, max_items=2, trailer=b"end"
+        )
+    )
+
+    assert chunks == [b"0;1;", b"2;3;", b"4;end"]
+
+
+@pytest.mark.asyncio
+async def test_write_returning_false_ends_stream():
+    def write(item: bytes, out: bytearray) -> bool:
+        out += item
+        return item != b"stop;"
+
+    chunks = await _collect(
+        coalesce_stream(_source([b"a;", b"stop;", b"b;"]), write, trailer=b"end")
+    )
+
+    assert b"".join(chunks) == b"a;stop;"
+
+
+@pytest.mark.asyncio
+async def test_source_error_is_raised_after_written_frames():
+    chunks = []
+    with pytest.raises(RuntimeError, match="boom"):
+        async for chunk in coalesce_stream(
+            _source([b"a;", b"b;"], RuntimeError("boom")), _write, trailer=b"end"
+        ):
+            chunks.append(chunk)
+
+    assert b"".join(chunks) == b"a;b;"